@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+
+def _column_to_numpy(values, dtype=None):
+    # pandas and Polars return a view of their buffer whenever the dtype allows it;
+    # PyArrow only does so when asked not to insist on zero-copy (nulls need a copy).
+    if type(values).__module__.startswith('pyarrow'):
+        return values.to_numpy(zero_copy_only=False)
+    if isinstance(values, (pd.Series, pd.Index)) and dtype is not None \
+            and isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+        return values.to_numpy(dtype=dtype, na_value=np.nan)
+    return values.to_numpy()
+
+
+def as_array(values, dtype=float):
+    """
+    Normalizes a column of values into a contiguous NumPy array.
+
+    Accepts lists, NumPy arrays (including memory-mapped ones), pandas Series/Index,
+    Polars Series and PyArrow Array/ChunkedArray. Columns already stored contiguously
+    with the requested dtype are returned without copying; missing values become NaN.
+    """
+    if not isinstance(values, np.ndarray) and hasattr(values, 'to_numpy'):
+        values = _column_to_numpy(values, dtype)
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+def as_column(values):
+    """
+    Normalizes a column into a NumPy array, keeping its original dtype (labels, dates, positions).
+    """
+    if not isinstance(values, np.ndarray) and hasattr(values, 'to_numpy'):
+        values = _column_to_numpy(values)
+    return np.asarray(values)
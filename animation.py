@@ -0,0 +1,312 @@
+import collections
+import math
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from adapters import as_array, as_column
+from artists import bar_collection, bar_verts
+from change_in_time import circles_timeline
+from correlation import bubble_chart
+from figures import new_figure
+from palettes import get_cmap
+
+# ffmpeg arguments per container when writing to a file object (which needs a streamable format).
+STREAM_FORMATS = {'mp4': ['-movflags', 'frag_keyframe+empty_moov'], 'webm': [], 'mkv': []}
+
+# Frames are rendered in ranges of at most this many, and at most TASKS_IN_FLIGHT ranges per
+# worker are rendered ahead of the encoder, which bounds the frames held in memory.
+FRAMES_PER_TASK = 32
+TASKS_IN_FLIGHT = 2
+
+
+def keyframe_times(times):
+    """
+    Converts keyframe times (numbers or datetimes) to floats; returns (times, is_date).
+    """
+    times = as_column(times)
+    if times.dtype == object:
+        times = times.astype('datetime64[s]')
+    if np.issubdtype(times.dtype, np.datetime64):
+        return times.astype('datetime64[s]').astype(float), True
+    return times.astype(float), False
+
+
+def interpolate_keyframes(key_times, keyframes, frame_times):
+    """
+    Linearly interpolates keyframe arrays at every frame time in one vectorized step.
+
+    keyframes has one row (of any shape) per key time; returns one row per frame time,
+    holding the first and last keyframes outside their range.
+    """
+    keyframes = np.asarray(keyframes, dtype=float)
+    if len(key_times) == 1:
+        return np.repeat(keyframes, len(frame_times), axis=0)
+    right = np.clip(np.searchsorted(key_times, frame_times, side='right'), 1, len(key_times) - 1)
+    left = right - 1
+    span = key_times[right] - key_times[left]
+    weight = np.clip((frame_times - key_times[left]) / np.where(span > 0, span, 1), 0, 1)
+    weight = weight.reshape(-1, *[1] * (keyframes.ndim - 1))
+    return keyframes[left] * (1 - weight) + keyframes[right] * weight
+
+
+def _time_labels(frame_times, is_date):
+    if is_date:
+        return list(np.datetime_as_string(np.round(frame_times).astype('datetime64[s]'), unit='D'))
+    return [f'{time:g}' for time in frame_times]
+
+
+def _render_range(scene, scene_kwargs, key_times, keyframes, frame_times, labels, dpi, encoding):
+    # Worker entry point: builds the scene's figure once, then for every frame updates its
+    # artists in place, draws it and returns the frames as GIF-ready images or RGBA arrays.
+    frames = {name: interpolate_keyframes(key_times, values, frame_times) for name, values in keyframes.items()}
+    fig, update = scene(keyframes, **scene_kwargs)
+    fig.set_dpi(dpi)
+    rendered = []
+    for index, label in enumerate(labels):
+        update({name: values[index] for name, values in frames.items()}, label)
+        fig.canvas.draw()
+        buffer = fig.canvas.buffer_rgba()
+        if encoding == 'gif':
+            image = Image.frombuffer('RGBA', (buffer.shape[1], buffer.shape[0]), bytes(buffer), 'raw', 'RGBA', 0, 1)
+            rendered.append(image.convert('RGB').quantize(256))
+        else:
+            rendered.append(np.array(buffer))
+    return rendered
+
+
+def _frame_stream(scene, scene_kwargs, key_times, keyframes, frame_times, labels, dpi, encoding, workers):
+    # Splits the frames into contiguous ranges rendered by worker processes and yields the frames in
+    # order. A new range is submitted only as the encoder consumes one, so a slow encoder holds
+    # back the workers instead of letting rendered frames pile up.
+    n_workers = workers or os.cpu_count() or 1
+    n_ranges = max(math.ceil(len(frame_times) / FRAMES_PER_TASK), 1)
+    if workers != 1:
+        n_ranges = max(n_ranges, min(len(frame_times) // 8, 4 * n_workers))
+    ranges = np.array_split(np.arange(len(frame_times)), n_ranges)
+    tasks = ((scene, scene_kwargs, key_times, keyframes, frame_times[r], labels[r[0]:r[-1] + 1], dpi, encoding)
+             for r in ranges if len(r))
+    if workers == 1:
+        for task in tasks:
+            yield from _render_range(*task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque(pool.submit(_render_range, *task)
+                                    for _, task in zip(range(TASKS_IN_FLIGHT * n_workers), tasks))
+        try:
+            while pending:
+                rendered = pending.popleft().result()
+                task = next(tasks, None)
+                if task is not None:
+                    pending.append(pool.submit(_render_range, *task))
+                yield from rendered
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _write_gif(output, frames, fps):
+    first = next(frames)
+    first.save(output, format='GIF', save_all=True, append_images=frames, duration=round(1000 / fps), loop=0)
+
+
+def _write_ffmpeg(output, frames, fps, video_format):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise ValueError(f"Writing {video_format} needs ffmpeg on the PATH; write a .gif instead.")
+    first = next(frames)
+    to_file = isinstance(output, (str, os.PathLike))
+    command = [ffmpeg, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+               '-s', f'{first.shape[1]}x{first.shape[0]}', '-r', str(fps), '-i', 'pipe:0',
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p']
+    if to_file:
+        command.append(os.fspath(output))
+    else:
+        command += [*STREAM_FORMATS.get(video_format, []), '-f', video_format, 'pipe:1']
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=None if to_file else subprocess.PIPE)
+
+    def feed():
+        process.stdin.write(first.tobytes())
+        for frame in frames:
+            process.stdin.write(frame.tobytes())
+        process.stdin.close()
+
+    if to_file:
+        feed()
+    else:
+        # Frames are fed from a second thread while this one copies the encoded stream, so
+        # neither pipe can fill up and block ffmpeg.
+        feeder = threading.Thread(target=feed)
+        feeder.start()
+        for chunk in iter(lambda: process.stdout.read(1 << 16), b''):
+            output.write(chunk)
+        feeder.join()
+    if process.wait() != 0:
+        raise ValueError(f"ffmpeg failed with exit code {process.returncode}.")
+
+
+def animate(scene, times, keyframes, output, frames_per_key=10, fps=20, dpi=100, workers=None, video_format=None,
+            **scene_kwargs):
+    """
+    Renders an animation of a scene through keyframes and streams it to an encoder.
+
+    Frames between keyframes are interpolated with interpolate_keyframes. Contiguous frame ranges
+    are rendered by worker processes (workers=1 renders in this process), each of which builds
+    the scene's figure once and updates its artists in place for every frame. Frames go straight
+    to Pillow's GIF writer or through a pipe to a local ffmpeg, without temporary files.
+
+    Parameters:
+    - scene: module-level function scene(keyframes, **scene_kwargs) returning (fig, update), where
+      update(frame, label) sets one frame's data; see bubble_scene, bar_race_scene.
+    - times: time of each keyframe (numbers or datetimes).
+    - keyframes: dict of arrays with one row per keyframe.
+    - output: file path, or a binary file object together with video_format.
+    - video_format: 'gif' or an ffmpeg format such as 'mp4'; defaults to the path's extension.
+    Returns the number of frames written.
+    """
+    key_times, is_date = keyframe_times(times)
+    keyframes = {name: np.asarray(values, dtype=float) for name, values in keyframes.items()}
+    frame_times = np.linspace(key_times[0], key_times[-1], (len(key_times) - 1) * frames_per_key + 1)
+    labels = _time_labels(frame_times, is_date)
+    if video_format is None:
+        video_format = os.path.splitext(os.fspath(output))[1].lstrip('.').lower()
+    encoding = 'gif' if video_format == 'gif' else 'rgba'
+
+    frames = _frame_stream(scene, scene_kwargs, key_times, keyframes, frame_times, labels, dpi, encoding, workers)
+    if encoding == 'gif':
+        _write_gif(output, frames, fps)
+    else:
+        _write_ffmpeg(output, frames, fps, video_format)
+    return len(frame_times)
+
+
+def bubble_scene(keyframes, chart=bubble_chart, x=None, y=None, size=None, size_name='size', clock=True,
+                 **chart_kwargs):
+    """
+    Scene for animate: a scatter-based chart whose x, y and sizes come from keyframes or stay fixed.
+
+    The chart is drawn once with the first keyframe; each frame then replaces the scatter's
+    offsets and sizes. Animated axes get limits covering every keyframe, so the view stays put.
+    """
+    first = {name: keyframes[name][0] if name in keyframes else value
+             for name, value in (('x', x), ('y', y), ('size', size))}
+    fig = chart(first['x'], first['y'], **{size_name: first['size']}, **chart_kwargs)
+    ax = fig.axes[0]
+    points = ax.collections[0]
+    offsets = np.array(points.get_offsets(), dtype=float)
+    sizes = np.broadcast_to(points.get_sizes(), len(offsets)).astype(float)
+    for name, set_limits in (('x', ax.set_xlim), ('y', ax.set_ylim)):
+        if name in keyframes:
+            low, high = np.nanmin(keyframes[name]), np.nanmax(keyframes[name])
+            margin = (high - low) * 0.05 or 1
+            set_limits(low - margin, high + margin)
+    label = ax.text(0.98, 0.04, '', transform=ax.transAxes, ha='right', fontsize='xx-large', color='gray',
+                    visible=clock)
+
+    def update(frame, time_label):
+        if 'x' in frame:
+            offsets[:, 0] = frame['x']
+        if 'y' in frame:
+            offsets[:, 1] = frame['y']
+        if 'size' in frame:
+            sizes[:] = frame['size']
+        points.set_offsets(offsets)
+        points.set_sizes(sizes)
+        label.set_text(time_label)
+
+    return fig, update
+
+
+def bar_race_scene(keyframes, categories, top_k=10, cmap='tab20', xlabel='Value', ylabel='Category',
+                   title='Ordered Bar Chart', figsize=(8, 6), value_format='{:,.0f}', bar_kwargs=None):
+    """
+    Scene for animate: a bar chart race of the top_k categories, drawn as one bar collection.
+
+    keyframes holds 'values' and 'ranks' (categories by column); ranks are interpolated as well,
+    so bars glide between positions. Each frame rewrites the collection's vertices, and a fixed
+    set of top_k + 1 labels is reassigned to the bars currently in view.
+    """
+    if bar_kwargs is None:
+        bar_kwargs = {}
+
+    categories = as_column(categories).astype(str)
+    colormap = get_cmap(cmap)
+    fig, ax = new_figure(figsize=figsize)
+    bars = bar_collection(ax, np.zeros(len(categories)), np.zeros(len(categories)), horizontal=True,
+                          facecolors=colormap(np.arange(len(categories)) % colormap.N), **bar_kwargs)
+    ax.set_ylim(top_k - 0.5, -0.5)
+    ax.set_yticks([])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    labels = [ax.text(0, 0, '', va='center', fontsize='small', clip_on=True) for _ in range(top_k + 1)]
+    clock = ax.text(0.98, 0.04, '', transform=ax.transAxes, ha='right', fontsize='xx-large', color='gray')
+
+    def update(frame, time_label):
+        values, ranks = frame['values'], frame['ranks']
+        bars.set_verts(bar_verts(ranks, values, horizontal=True))
+        shown = np.argsort(ranks)[:top_k + 1] if len(ranks) <= top_k + 1 else \
+            np.argpartition(ranks, top_k)[:top_k + 1]
+        ax.set_xlim(0, max(np.nanmax(values[shown]), 1e-12) * 1.3)
+        for text, index in zip(labels, shown):
+            text.set_position((values[index], ranks[index]))
+            text.set_text(f' {categories[index]}  {value_format.format(values[index])}')
+        clock.set_text(time_label)
+
+    return fig, update
+
+
+def animate_bubble_chart(times, x, y, size, output, frames_per_key=10, fps=20, dpi=100, workers=None, **chart_kwargs):
+    """
+    Creates an animated bubble chart; x, y and size are 2D (keyframes x bubbles) to animate them or 1D to keep them fixed.
+
+    Best used for: Showing how several variables of many entities evolve together over time.
+    """
+    return _animate_scatter(bubble_chart, 'size', times, x, y, size, output, frames_per_key, fps, dpi, workers,
+                            chart_kwargs)
+
+
+def animate_circles_timeline(times, x, y, sizes, output, frames_per_key=10, fps=20, dpi=100, workers=None,
+                             **chart_kwargs):
+    """
+    Creates an animated circles timeline; x, y and sizes are 2D (keyframes x circles) to animate them or 1D to keep them fixed.
+
+    Best used for: Showing discrete values across categories growing and shrinking over time.
+    """
+    return _animate_scatter(circles_timeline, 'sizes', times, x, y, sizes, output, frames_per_key, fps, dpi, workers,
+                            chart_kwargs)
+
+
+def _animate_scatter(chart, size_name, times, x, y, size, output, frames_per_key, fps, dpi, workers, chart_kwargs):
+    keyframes, fixed = {}, {}
+    for name, values in (('x', x), ('y', y), ('size', size)):
+        values = as_column(values)
+        if values.ndim == 2:
+            keyframes[name] = values
+        else:
+            fixed[name] = values
+    return animate(bubble_scene, times, keyframes, output, frames_per_key, fps, dpi, workers, chart=chart,
+                   size_name=size_name, **fixed, **chart_kwargs)
+
+
+def animate_bar_race(times, categories, values, output, top_k=10, frames_per_key=10, fps=20, dpi=100, workers=None,
+                     **race_kwargs):
+    """
+    Creates a bar chart race: the animated version of ranking.bar_ordered.
+
+    Best used for: Showing how the leaders of a ranking change over time.
+
+    Parameters:
+    - values: 2D array with one row per keyframe and one column per category.
+    """
+    values = as_array(values)
+    order = np.argsort(-values, axis=1, kind='stable')
+    ranks = np.empty_like(values)
+    np.put_along_axis(ranks, order, np.arange(values.shape[1], dtype=float)[None, :], axis=1)
+    return animate(bar_race_scene, times, {'values': values, 'ranks': ranks}, output, frames_per_key, fps, dpi,
+                   workers, categories=categories, top_k=top_k, **race_kwargs)
@@ -0,0 +1,127 @@
+from functools import lru_cache
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.markers import MarkerStyle
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+
+from labels import declutter, text_gap
+from palettes import get_cmap, parse_color, sign_colors
+
+# Named pictogram icons that map onto built-in markers (including the emoji the text-only
+# pictogram used to print, which most Matplotlib fonts cannot render).
+ICON_ALIASES = {'circle': 'o', 'square': 's', 'triangle': '^', '🔵': 'o', '⬛': 's'}
+
+
+def bar_verts(positions, heights, width=0.8, bottom=0, horizontal=False):
+    """
+    Returns the (n, 4, 2) corner array of n bars, as drawn by bar_collection.
+    """
+    positions = np.asarray(positions, dtype=float)
+    heights = np.asarray(heights, dtype=float)
+    half = np.broadcast_to(np.asarray(width, dtype=float) / 2, positions.shape)
+    base = np.broadcast_to(np.asarray(bottom, dtype=float), positions.shape)
+
+    verts = np.empty((len(positions), 4, 2))
+    verts[:, 0, 0] = verts[:, 1, 0] = positions - half
+    verts[:, 2, 0] = verts[:, 3, 0] = positions + half
+    verts[:, 0, 1] = verts[:, 3, 1] = base
+    verts[:, 1, 1] = verts[:, 2, 1] = base + heights
+    if horizontal:
+        verts = verts[:, :, ::-1]
+    return verts
+
+
+def bar_collection(ax, positions, heights, width=0.8, bottom=0, horizontal=False, **collection_kwargs):
+    """
+    Draws many bars as a single PolyCollection instead of one Rectangle artist per bar.
+
+    Parameters:
+    - positions: centre of each bar along the category axis.
+    - heights: length of each bar along the value axis.
+    - width: bar thickness (scalar or one value per bar).
+    - bottom: baseline of each bar (scalar or one value per bar).
+    - horizontal: draw bars along the x-axis like ax.barh.
+    """
+    bars = PolyCollection(bar_verts(positions, heights, width, bottom, horizontal), **collection_kwargs)
+    if np.ndim(bottom) == 0:
+        # Like ax.bar, keep autoscaling from adding a margin below a shared baseline.
+        (bars.sticky_edges.x if horizontal else bars.sticky_edges.y).append(float(bottom))
+    ax.add_collection(bars)
+    ax.autoscale_view()
+    return bars
+
+
+@lru_cache(maxsize=None)
+def icon_marker(symbol):
+    """
+    Returns a marker for pictogram icons, built once per symbol.
+
+    symbol is a Matplotlib marker code ('o', 's', '^', ...), a name from ICON_ALIASES, 'person',
+    or any other text, whose glyph outline becomes the marker path.
+    """
+    if symbol in ICON_ALIASES:
+        return ICON_ALIASES[symbol]
+    if symbol == 'person':
+        head = Path.circle((0, 0.65), 0.22)
+        body = Path([(-0.3, -0.6), (-0.3, 0.3), (0.3, 0.3), (0.3, -0.6), (-0.3, -0.6)],
+                    [Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY])
+        return Path.make_compound_path(head, body)
+    if symbol in MarkerStyle.markers:
+        return symbol
+    glyph = TextPath((0, 0), symbol, prop=FontProperties(family='DejaVu Sans'))
+    # Marker paths are scaled around the origin, so the glyph is centred on it first.
+    center = glyph.get_extents().get_points().mean(axis=0)
+    return glyph.transformed(Affine2D().translate(*-center))
+
+
+def slope_collection(ax, x, values, labels=None, highlight=None, max_labels=30, fontsize='small',
+                     muted_color='lightgray', line_kwargs=None):
+    """
+    Draws every series of a slope chart as one LineCollection and labels line ends directly.
+
+    Parameters:
+    - x: positions shared by all series.
+    - values: 2D array with one row per series.
+    - highlight: number of top movers (largest change between first and last point) to colour,
+      rising in green and falling in red; the other series are muted. None colours every series.
+    - labels: series names, written at the line ends with overlaps spread apart. Only highlighted
+      series are labelled, or every series when there are at most max_labels.
+    """
+    if line_kwargs is None:
+        line_kwargs = {}
+
+    x = np.asarray(x, dtype=float)
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    segments = np.empty(values.shape + (2,))
+    segments[..., 0] = x
+    segments[..., 1] = values
+
+    change = values[:, -1] - values[:, 0]
+    if highlight is None:
+        shown = np.arange(len(values))
+        colors = get_cmap('tab10')(shown % 10)
+    else:
+        shown = np.arange(len(values))
+        if highlight < len(values):
+            shown = np.argpartition(np.abs(change), -highlight)[-highlight:]
+        colors = np.tile(parse_color(muted_color), (len(values), 1))
+        colors[shown] = sign_colors(change[shown], negative='tab:red', positive='tab:green')
+        # Draw the highlighted series last so they sit on top of the muted ones.
+        order = np.concatenate((np.setdiff1d(np.arange(len(values)), shown), shown))
+        segments, colors = segments[order], colors[order]
+
+    ax.add_collection(LineCollection(segments, colors=colors, **line_kwargs))
+    ax.scatter(segments[..., 0].ravel(), segments[..., 1].ravel(), c=np.repeat(colors, values.shape[1], axis=0),
+               s=12, zorder=3)
+    ax.autoscale_view()
+
+    if labels is not None and (highlight is not None or len(values) <= max_labels):
+        labels = np.asarray(labels)
+        ends = declutter(values[shown, -1], text_gap(ax, fontsize))
+        for series, y in zip(shown, ends):
+            ax.annotate(str(labels[series]), (x[-1], y), xytext=(6, 0), textcoords='offset points',
+                        va='center', fontsize=fontsize, annotation_clip=False)
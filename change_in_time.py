@@ -1,27 +1,57 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
 
-def line_chart(x, y, xlabel='Time', ylabel='Value', title='Line Chart', line_kwargs=None):
+from adapters import as_array, as_column
+from artists import slope_collection
+from figures import finish, new_figure
+from matrix import draw_matrix, heatmap_options
+from palettes import sign_colors
+from profiling import phase, profiled
+from sketches import PathQuantiles
+from timeline import draw_intervals, interval_bounds, pack_intervals, visible_intervals
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+CALENDAR_WEEKS = 54  # Monday-based week columns needed to hold any year
+
+def _pyramid_window(ax, pyramid, window):
+    # One bucket per horizontal pixel of the Axes.
+    start, stop = (None, None) if window is None else window
+    return pyramid.window(start, stop, pixels=max(int(ax.bbox.width), 1))
+
+
+@profiled
+def line_chart(x=None, y=None, xlabel='Time', ylabel='Value', title='Line Chart', line_kwargs=None, ax=None,
+               pyramid=None, window=None):
     """
     Creates a standard line chart to show changes over time.
     
     Best used for: Time series trends (e.g., stock prices, economic indicators).
+
+    Parameters:
+    - pyramid: a pyramid.SeriesPyramid to draw instead of x and y; the per-pixel mean is drawn as the
+      line and the min-max range as a band behind it.
+    - window: (start, stop) x range read from the pyramid (defaults to the whole series).
     """
 
     if line_kwargs is None:
         line_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.plot(x, y, **line_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    if pyramid is not None:
+        x, low, high, mean = _pyramid_window(ax, pyramid, window)
+        line = ax.plot(x, mean, drawstyle='steps-post', **line_kwargs)[0]
+        ax.fill_between(x, low, high, step='post', color=line.get_color(), alpha=0.3, linewidth=0)
+    else:
+        ax.plot(as_column(x), as_array(y), **line_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def column_timeline(x, y, xlabel='Time', ylabel='Value', title='Column Timeline', bar_kwargs=None):
+@profiled
+def column_timeline(x, y, xlabel='Time', ylabel='Value', title='Column Timeline', bar_kwargs=None, ax=None):
     """
     Creates a column chart to show changes over time.
     
@@ -31,32 +61,49 @@ def column_timeline(x, y, xlabel='Time', ylabel='Value', title='Column Timeline'
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.bar(x, y, **bar_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.bar(as_column(x), as_array(y), **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def slope_chart(categories, values, xlabel='Category', ylabel='Value', title='Slope Chart', line_kwargs=None):
+@profiled
+def slope_chart(categories, values, xlabel='Category', ylabel='Value', title='Slope Chart', line_kwargs=None,
+                series_labels=None, highlight=None, ax=None):
     """ 
     Creates a slope chart to show changes between 2-3 key points.
     
     Best used for: Showing simple changes between categories without missing key details.
+
+    Parameters:
+    - values: one value per category, or a 2D array with one row per series to compare many series at once.
+    - series_labels: names written at the line ends of a multi-series chart.
+    - highlight: number of top movers to colour and label in a multi-series chart.
     """
     if line_kwargs is None:
         line_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.plot(categories, values, marker='o', **line_kwargs)
+    categories = as_column(categories)
+    values = as_array(values)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    if values.ndim == 1:
+        ax.plot(categories, values, marker='o', **line_kwargs)
+    else:
+        x = np.arange(len(categories))
+        slope_collection(ax, x, values, labels=series_labels, highlight=highlight, line_kwargs=line_kwargs)
+        ax.set_xlim(x[0] - 0.1, x[-1] + 0.3 * len(x))
+        ax.set_xticks(x)
+        ax.set_xticklabels(categories)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def area_chart(x, y, xlabel='Time', ylabel='Value', title='Area Chart', area_kwargs=None):
+@profiled
+def area_chart(x, y, xlabel='Time', ylabel='Value', title='Area Chart', area_kwargs=None, ax=None):
     """
     Creates an area chart to show changes in total values over time.
     
@@ -65,14 +112,15 @@ def area_chart(x, y, xlabel='Time', ylabel='Value', title='Area Chart', area_kwa
     if area_kwargs is None:
         area_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.fill_between(x, y, **area_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.fill_between(as_column(x), as_array(y), **area_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def stock_price_chart(dates, open_prices, close_prices, high_prices, low_prices, title='Stock Price Chart', candlestick_kwargs=None):
+@profiled
+def stock_price_chart(dates, open_prices, close_prices, high_prices, low_prices, title='Stock Price Chart', candlestick_kwargs=None, ax=None):
     """
     Creates a stock price chart showing open, close, high, and low values per time unit.
 
@@ -81,39 +129,82 @@ def stock_price_chart(dates, open_prices, close_prices, high_prices, low_prices,
     if candlestick_kwargs is None:
         candlestick_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    for i in range(len(dates)):
-        color = 'green' if close_prices[i] > open_prices[i] else 'red'
-        ax.plot([dates[i], dates[i]], [low_prices[i], high_prices[i]], color=color, **candlestick_kwargs)
-        ax.plot([dates[i], dates[i]], [open_prices[i], close_prices[i]], color=color, linewidth=3)
-    
+    dates = as_column(dates)
+    open_prices = as_array(open_prices)
+    close_prices = as_array(close_prices)
+    # Green only for a strictly higher close, as flat sessions are drawn red.
+    colors = sign_colors(open_prices - close_prices, negative='green', positive='red')
+
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    ax.vlines(dates, as_array(low_prices), as_array(high_prices), colors=colors, **candlestick_kwargs)
+    ax.vlines(dates, open_prices, close_prices, colors=colors, linewidth=3)
+
     ax.set_title(title)
     ax.set_xlabel('Time')
     ax.set_ylabel('Price')
-    plt.show()
+    return finish(fig)
 
-def fan_chart(x, y_mean, y_lower, y_upper, xlabel='Time', ylabel='Value', title='Fan Chart', line_kwargs=None, fill_kwargs=None):
+@profiled
+def fan_chart(x, y_mean, y_lower, y_upper, xlabel='Time', ylabel='Value', title='Fan Chart', line_kwargs=None, fill_kwargs=None, ax=None):
     """
     Creates a fan chart to show uncertainty in future projections.
     Best used for: Forecasting uncertainty, confidence intervals.
 
-
+    Parameters:
+    - y_lower, y_upper: one band, or 2D arrays with one row per nested band, outermost first.
     """
     if line_kwargs is None:
         line_kwargs = {}
     if fill_kwargs is None:
         fill_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.plot(x, y_mean, label='Projection', color='black', **line_kwargs)
-    ax.fill_between(x, y_lower, y_upper, color='blue', alpha=0.3, **fill_kwargs)
+    x = as_column(x)
+    y_lower = np.atleast_2d(as_array(y_lower))
+    y_upper = np.atleast_2d(as_array(y_upper))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.plot(x, as_array(y_mean), label='Projection', color='black', **line_kwargs)
+    # Nested bands overlap, so each inner band reads darker than the one around it.
+    for lower, upper in zip(y_lower, y_upper):
+        ax.fill_between(x, lower, upper, color='blue', alpha=0.3, **fill_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
     ax.legend()
-    plt.show()
+    return finish(fig)
+
+@profiled
+def fan_chart_from_paths(chunks, x=None, percentiles=(5, 25, 50, 75, 95), relative_accuracy=0.005, xlabel='Time', ylabel='Value',
+                         title='Fan Chart', line_kwargs=None, fill_kwargs=None, ax=None):
+    """
+    Creates a fan chart of nested percentile bands from simulated paths, streamed in chunks.
+
+    Best used for: Summarising Monte Carlo forecasts with too many paths to hold in memory.
 
-def scatterplot_line_timeline(x, y, xlabel='Time', ylabel='Value', title='Connected Scatterplot Timeline', line_kwargs=None, scatter_kwargs=None):
+    Parameters:
+    - chunks: iterable of (n_paths, n_steps) arrays; a single 2D array is treated as one chunk.
+    - percentiles: symmetric percentiles pairing into bands (5/95, 25/75); 50 is drawn as the centre line,
+      or the mean path when it is not listed.
+    - relative_accuracy: relative error bound of every percentile (see sketches.PathQuantiles); memory
+      per timestep grows as log(value range) / relative_accuracy.
+    """
+    if isinstance(chunks, np.ndarray) and chunks.ndim == 2:
+        chunks = [chunks]
+    with phase('prepare'):
+        sketch = PathQuantiles(relative_accuracy=relative_accuracy)
+        for chunk in chunks:
+            sketch.add(chunk)
+        percentiles = sorted(percentiles)
+        bands = sketch.quantiles(np.asarray(percentiles) / 100)
+
+    n_bands = len(percentiles) // 2
+    centre = bands[percentiles.index(50)] if 50 in percentiles else sketch.mean()
+    if x is None:
+        x = np.arange(bands.shape[1])
+    return fan_chart(x, centre, bands[:n_bands], bands[::-1][:n_bands], xlabel=xlabel, ylabel=ylabel, title=title,
+                     line_kwargs=line_kwargs, fill_kwargs=fill_kwargs, ax=ax)
+
+@profiled
+def scatterplot_line_timeline(x, y, xlabel='Time', ylabel='Value', title='Connected Scatterplot Timeline', line_kwargs=None, scatter_kwargs=None, ax=None):
     """
     Creates a connected scatterplot timeline.
 
@@ -126,15 +217,18 @@ def scatterplot_line_timeline(x, y, xlabel='Time', ylabel='Value', title='Connec
     if scatter_kwargs is None:
         scatter_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(8, 6))
+    x = as_column(x)
+    y = as_array(y)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.plot(x, y, linestyle='-', marker='o', **line_kwargs)
     ax.scatter(x, y, **scatter_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def calendar_heatmap(data, x_labels, y_labels, xlabel='Time', ylabel='Categories', title='Calendar Heatmap', heatmap_kwargs=None):
+@profiled
+def calendar_heatmap(data, x_labels, y_labels, xlabel='Time', ylabel='Categories', title='Calendar Heatmap', heatmap_kwargs=None, annot=False, ax=None):
     """
     Creates a calendar heatmap to show temporal patterns.
 
@@ -142,38 +236,152 @@ def calendar_heatmap(data, x_labels, y_labels, xlabel='Time', ylabel='Categories
 
     Parameters:
     - data: 2D array (matrix) of heatmap values.
+    - annot: annotate cells with their values (None annotates only small matrices).
+    - heatmap_kwargs: sns.heatmap-style options (see matrix.heatmap_options); other keys go to imshow.
     """
-    if heatmap_kwargs is None:
-        heatmap_kwargs = {}
+    options = {'annot': annot, **heatmap_options(heatmap_kwargs)}
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.heatmap(data, xticklabels=x_labels, yticklabels=y_labels, **heatmap_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    draw_matrix(ax, data, x_labels, y_labels, cmap='rocket', **options)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
+
+def _calendar_cells(timestamps):
+    days = as_column(timestamps).astype('datetime64[D]')
+    day_number = days.astype(np.int64)
+    jan1 = days.astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday, so (day + 3) % 7 counts weekdays from Monday.
+    weekday = (day_number + 3) % 7
+    week = (day_number - jan1 + (jan1 + 3) % 7) // 7
+    return days.astype('datetime64[Y]').astype(np.int64) + 1970, weekday, week
+
+def calendar_grid(timestamps=None, values=None, agg='sum', chunks=None):
+    """
+    Bins timestamped events into a calendar matrix with one row per weekday of each year and one column per week.
+
+    Parameters:
+    - timestamps: datetime64-compatible array of event times.
+    - values: optional per-event values; without them every event counts as 1.
+    - agg: 'sum', 'count' or 'mean' per day.
+    - chunks: iterable of timestamp arrays or (timestamps, values) pairs, for inputs that do not fit in memory.
+
+    Returns (data, x_labels, y_labels) for calendar_heatmap. Days that do not exist in a year are NaN.
+    Events with a missing time (NaT) are skipped; without any valid time the grid has no rows.
+    """
+    if agg not in ('sum', 'count', 'mean'):
+        raise ValueError("agg must be 'sum', 'count' or 'mean'.")
+    if chunks is None:
+        chunks = [(timestamps, values)]
+
+    first_year = None
+    sums = np.zeros((0, 7, CALENDAR_WEEKS))
+    counts = np.zeros((0, 7, CALENDAR_WEEKS))
+    for chunk in chunks:
+        chunk_times, chunk_values = chunk if isinstance(chunk, tuple) else (chunk, None)
+        chunk_times = as_column(chunk_times).astype('datetime64[D]')
+        valid = ~np.isnat(chunk_times)
+        if not valid.all():
+            chunk_times = chunk_times[valid]
+            chunk_values = None if chunk_values is None else as_array(chunk_values)[valid]
+        years, weekday, week = _calendar_cells(chunk_times)
+        if len(years) == 0:
+            continue
+
+        # Grow the year axis when a chunk reaches outside the years seen so far.
+        low, high = years.min(), years.max()
+        if first_year is None:
+            first_year = low
+        last_year = first_year + len(sums) - 1
+        if low < first_year or high > last_year:
+            pad = ((first_year - min(low, first_year), max(high, last_year) - last_year), (0, 0), (0, 0))
+            sums = np.pad(sums, pad)
+            counts = np.pad(counts, pad)
+            first_year = min(low, first_year)
+
+        cells = ((years - first_year) * 7 + weekday) * CALENDAR_WEEKS + week
+        chunk_counts = np.bincount(cells, minlength=sums.size).reshape(sums.shape)
+        counts += chunk_counts
+        if chunk_values is None:
+            sums += chunk_counts
+        else:
+            sums += np.bincount(cells, weights=as_array(chunk_values), minlength=sums.size).reshape(sums.shape)
+
+    if first_year is None:
+        return np.empty((0, CALENDAR_WEEKS)), np.arange(CALENDAR_WEEKS), []
+
+    if agg == 'sum':
+        data = sums
+    elif agg == 'count':
+        data = counts
+    else:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data = np.where(counts > 0, sums / counts, np.nan)
+
+    all_days = np.arange(np.datetime64(f'{first_year}-01-01'), np.datetime64(f'{first_year + len(sums)}-01-01'))
+    years, weekday, week = _calendar_cells(all_days)
+    exists = np.zeros(sums.shape, dtype=bool)
+    exists[years - first_year, weekday, week] = True
+    data = np.where(exists, data, np.nan).reshape(-1, CALENDAR_WEEKS)
+
+    y_labels = [f'{year} {day}' for year in range(first_year, first_year + len(sums)) for day in WEEKDAYS]
+    return data, np.arange(CALENDAR_WEEKS), y_labels
+
+@profiled
+def calendar_heatmap_from_events(timestamps=None, values=None, agg='sum', chunks=None, xlabel='Week', ylabel='Day',
+                                 title='Calendar Heatmap', heatmap_kwargs=None, ax=None):
+    """
+    Creates a calendar heatmap straight from raw timestamped events, stacking one 7-row block per year.
 
-def priestley_timeline(events, durations, xlabel='Time', ylabel='Events', title='Priestley Timeline', bar_kwargs=None):
+    Best used for: Daily activity patterns over one or several years (e.g., orders, logins, incidents).
+
+    Parameters:
+    - timestamps, values, agg, chunks: see calendar_grid.
+    """
+    with phase('prepare'):
+        data, x_labels, y_labels = calendar_grid(timestamps, values, agg=agg, chunks=chunks)
+    return calendar_heatmap(data, x_labels, y_labels, xlabel=xlabel, ylabel=ylabel, title=title,
+                            heatmap_kwargs=heatmap_kwargs, ax=ax)
+
+@profiled
+def priestley_timeline(events, durations, xlabel='Time', ylabel='Events', title='Priestley Timeline', bar_kwargs=None,
+                       pack=False, window=None, ax=None):
     """
     Creates a Priestley timeline for date and duration visualization.
 
     Best used for: Highlighting date and duration relationships.
+
+    Parameters:
+    - durations: (start, end) pair per event, numeric or datetime.
+    - pack: share rows between events that do not overlap (one lane per row) instead of one row per event.
+    - window: (start, end) range to show; events entirely outside it are not drawn.
     """
     if bar_kwargs is None:
         bar_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    for i, (start, end) in enumerate(durations):
-        ax.barh(i, end - start, left=start, **bar_kwargs)
-    
-    ax.set_yticks(range(len(events)))
-    ax.set_yticklabels(events)
+    starts, ends, is_date = interval_bounds(durations)
+    events = as_column(events)
+    rows = pack_intervals(starts, ends) if pack else np.arange(len(starts))
+    if window is not None:
+        low, high, _ = interval_bounds([window])
+        visible = visible_intervals(starts, ends, (low[0], high[0]))
+        starts, ends, rows, events = starts[visible], ends[visible], rows[visible], events[visible]
+
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    draw_intervals(ax, starts, ends, rows, is_date=is_date, **bar_kwargs)
+    if window is not None:
+        ax.set_xlim(low[0], high[0])
+    if not pack:
+        ax.set_yticks(rows)
+        ax.set_yticklabels(events)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def circles_timeline(x, y, sizes, xlabel='Time', ylabel='Categories', title='Circles Timeline', scatter_kwargs=None):
+@profiled
+def circles_timeline(x, y, sizes, xlabel='Time', ylabel='Categories', title='Circles Timeline', scatter_kwargs=None, ax=None):
     """
     Creates a circles timeline to show discrete values over time.
 
@@ -184,25 +392,35 @@ def circles_timeline(x, y, sizes, xlabel='Time', ylabel='Categories', title='Cir
     if scatter_kwargs is None:
         scatter_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(x, y, s=sizes, **scatter_kwargs)
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    ax.scatter(as_column(x), as_column(y), s=as_array(sizes), **scatter_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def seismogram(x, y, xlabel='Time', ylabel='Magnitude', title='Seismogram', line_kwargs=None):
+@profiled
+def seismogram(x=None, y=None, xlabel='Time', ylabel='Magnitude', title='Seismogram', line_kwargs=None, ax=None,
+               pyramid=None, window=None):
     """
     Creates a seismogram-style chart for highly variable data.
 
     Best used for: Displaying series with big variations.
+
+    Parameters:
+    - pyramid: a pyramid.SeriesPyramid to draw instead of x and y, as one min-max stroke per pixel.
+    - window: (start, stop) x range read from the pyramid (defaults to the whole series).
     """
     if line_kwargs is None:
         line_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(x, y, **line_kwargs)
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    if pyramid is not None:
+        x, low, high, _ = _pyramid_window(ax, pyramid, window)
+        ax.vlines(x, low, high, **line_kwargs)
+    else:
+        ax.plot(as_column(x), as_array(y), **line_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
@@ -0,0 +1,90 @@
+import numpy as np
+
+# Above this many symbols, proportional symbol charts merge overlapping symbols by default.
+CLUSTER_THRESHOLD = 1000
+
+
+def symbol_areas(values, size_factor):
+    """
+    Returns scatter marker areas (points^2) proportional to |values|, so radii grow with the square root.
+    """
+    return np.abs(values) * size_factor
+
+
+def cluster_symbols(ax, x, y, values, size_factor, max_cell=0.1, max_passes=8):
+    """
+    Merges proportional symbols whose circles overlap on screen into one symbol per cluster.
+
+    Symbols are binned into a screen-space grid whose cells are as wide as the largest symbol
+    (at most max_cell of the smaller Axes side), and each non-empty cell becomes one symbol
+    carrying the summed value at the value-weighted centroid. Merged symbols are bigger, so the
+    binning repeats, shifting the grid by half a cell every other pass, until two passes in a
+    row merge nothing. Symbols outside the Axes view are dropped first.
+
+    Areas stay proportional to values, so a cluster covers the combined area of its members;
+    if the largest cluster would still be wider than a cell, size_factor is lowered for all of
+    them so that it fits. Positions are taken at the figure's current size, which should be set
+    before calling this.
+    Returns (x, y, values, counts, size_factor) of the clusters, in data coordinates.
+    """
+    x, y, values = np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(values, dtype=float)
+    ax.update_datalim(np.column_stack((x, y)))
+    ax.autoscale_view()
+    ax.apply_aspect()
+
+    pixels_per_point = ax.figure.dpi / 72
+    points = ax.transData.transform(np.column_stack((x, y)))
+    radii = np.sqrt(symbol_areas(values, size_factor) / np.pi) * pixels_per_point
+    bbox = ax.bbox
+    visible = ((points[:, 0] + radii >= bbox.x0) & (points[:, 0] - radii <= bbox.x1)
+               & (points[:, 1] + radii >= bbox.y0) & (points[:, 1] - radii <= bbox.y1))
+    points, values, radii = points[visible], values[visible], radii[visible]
+    counts = np.ones(len(values))
+
+    max_cell_pixels = max_cell * min(bbox.width, bbox.height)
+    quiet_passes = 0
+    for step in range(max_passes):
+        cell = min(2 * radii.max(initial=0), max_cell_pixels)
+        if cell <= 0 or len(values) < 2:
+            break
+        cells = np.floor((points - cell / 2 * (step % 2)) / cell).astype(np.int64)
+        cells -= cells.min(axis=0)
+        keys, inverse = np.unique(cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1], return_inverse=True)
+        if len(keys) == len(values):
+            quiet_passes += 1
+            if quiet_passes == 2:
+                break
+            continue
+        quiet_passes = 0
+
+        # Value-weighted centroids; clusters whose values are all zero fall back to the plain mean.
+        weights = np.abs(values)
+        weights = np.where(np.bincount(inverse, weights)[inverse] > 0, weights, 1.0)
+        totals = np.bincount(inverse, weights)
+        points = np.column_stack([np.bincount(inverse, weights * points[:, i]) / totals for i in (0, 1)])
+        values = np.bincount(inverse, values)
+        counts = np.bincount(inverse, counts)
+        radii = np.sqrt(symbol_areas(values, size_factor) / np.pi) * pixels_per_point
+
+    largest = np.abs(values).max(initial=0)
+    if largest > 0:
+        size_factor = min(size_factor, np.pi * (max_cell_pixels / 2 / pixels_per_point) ** 2 / largest)
+    x, y = ax.transData.inverted().transform(points).T if len(points) else (np.empty(0), np.empty(0))
+    return x, y, values, counts.astype(np.intp), size_factor
+
+
+def draw_proportional_symbols(ax, x, y, values, size_factor, cluster='auto', **scatter_kwargs):
+    """
+    Draws area-proportional symbols with one scatter, clustering overlapping ones first.
+
+    cluster='auto' clusters above CLUSTER_THRESHOLD symbols; True/False force it on or off.
+    Returns the PathCollection.
+    """
+    if cluster == 'auto':
+        cluster = len(values) > CLUSTER_THRESHOLD
+    if cluster:
+        # Category and date positions are converted to axis numbers first, as ax.scatter would.
+        ax.xaxis.update_units(x)
+        ax.yaxis.update_units(y)
+        x, y, values, _, size_factor = cluster_symbols(ax, ax.xaxis.convert_units(x), ax.yaxis.convert_units(y), values, size_factor)
+    return ax.scatter(x, y, s=symbol_areas(values, size_factor), **scatter_kwargs)
@@ -1,9 +1,14 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
 
-def scatterplot(x, y, xlabel="X-axis", ylabel="Y-axis", title="Scatterplot", figsize=(8, 6), scatter_kwargs=None):
+from adapters import as_array, as_column
+from figures import finish, new_figure
+from matrix import MAX_ANNOTATED_CELLS, draw_matrix, heatmap_options
+from profiling import profiled
+
+@profiled
+def scatterplot(x, y, xlabel="X-axis", ylabel="Y-axis", title="Scatterplot", figsize=(8, 6), scatter_kwargs=None, ax=None):
     """
     Creates a standard scatterplot to show relationships between two variables.
     
@@ -12,15 +17,16 @@ def scatterplot(x, y, xlabel="X-axis", ylabel="Y-axis", title="Scatterplot", fig
     if scatter_kwargs is None:
         scatter_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.scatter(x, y, **scatter_kwargs)
+    fig, ax = new_figure(figsize=figsize, ax=ax)
+    ax.scatter(as_array(x), as_array(y), **scatter_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def line_column(x, y_line, y_column, xlabel="X-axis", ylabel_line="Line Value", ylabel_column="Column Value", title="Line-Column Chart", figsize=(8, 6), line_kwargs=None, bar_kwargs=None):
+@profiled
+def line_column(x, y_line, y_column, xlabel="X-axis", ylabel_line="Line Value", ylabel_column="Column Value", title="Line-Column Chart", figsize=(8, 6), line_kwargs=None, bar_kwargs=None, ax=None):
     """
     Creates a combined line-column chart, showing relationships between an amount (column) and a rate (line).
     
@@ -31,19 +37,21 @@ def line_column(x, y_line, y_column, xlabel="X-axis", ylabel_line="Line Value",
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    fig, ax1 = plt.subplots(figsize=figsize)
+    x = as_column(x)
+    fig, ax1 = new_figure(figsize=figsize, ax=ax)
     ax2 = ax1.twinx()
-    ax1.bar(x, y_column, alpha=0.6, **bar_kwargs)
-    ax2.plot(x, y_line, color='red', marker='o', **line_kwargs)
+    ax1.bar(x, as_array(y_column), alpha=0.6, **bar_kwargs)
+    ax2.plot(x, as_array(y_line), color='red', marker='o', **line_kwargs)
     
     ax1.set_xlabel(xlabel)
     ax1.set_ylabel(ylabel_column, color='blue')
     ax2.set_ylabel(ylabel_line, color='red')
     ax1.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def scatterplot_connected(x, y, xlabel="X-axis", ylabel="Y-axis", title="Connected Scatterplot", figsize=(8, 6), scatter_kwargs=None, line_kwargs=None):
+@profiled
+def scatterplot_connected(x, y, xlabel="X-axis", ylabel="Y-axis", title="Connected Scatterplot", figsize=(8, 6), scatter_kwargs=None, line_kwargs=None, ax=None):
     """
     Creates a connected scatterplot to show how relationships between two variables evolve over time.
     
@@ -54,15 +62,18 @@ def scatterplot_connected(x, y, xlabel="X-axis", ylabel="Y-axis", title="Connect
     if line_kwargs is None:
         line_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=figsize)
+    x = as_array(x)
+    y = as_array(y)
+    fig, ax = new_figure(figsize=figsize, ax=ax)
     ax.scatter(x, y, **scatter_kwargs)
     ax.plot(x, y, **line_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def bubble_chart(x, y, size, xlabel="X-axis", ylabel="Y-axis", title="Bubble Chart", figsize=(8, 6), scatter_kwargs=None):
+@profiled
+def bubble_chart(x, y, size, xlabel="X-axis", ylabel="Y-axis", title="Bubble Chart", figsize=(8, 6), scatter_kwargs=None, ax=None):
     """
     Creates a bubble chart, similar to a scatterplot but with a third variable represented by bubble size.
     
@@ -71,24 +82,33 @@ def bubble_chart(x, y, size, xlabel="X-axis", ylabel="Y-axis", title="Bubble Cha
     if scatter_kwargs is None:
         scatter_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.scatter(x, y, s=size, **scatter_kwargs)
+    fig, ax = new_figure(figsize=figsize, ax=ax)
+    ax.scatter(as_column(x), as_array(y), s=as_array(size), **scatter_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def xy_heatmap(data, x_labels, y_labels, title="XY Heatmap", figsize=(8, 6), heatmap_kwargs=None):
+@profiled
+def xy_heatmap(data, x_labels, y_labels, title="XY Heatmap", figsize=(8, 6), heatmap_kwargs=None, annot=True,
+               reorder=None, max_annot_cells=MAX_ANNOTATED_CELLS, ax=None):
     """
     Creates an XY heatmap to visualize patterns between two categorical variables.
     
     Best used for: Showing interactions between two categorical datasets (e.g., industry vs. employment rate).
+
+    Parameters:
+    - data: 2D array of values; np.memmap matrices are read in blocks and never loaded whole.
+    - annot: annotate cells; above max_annot_cells only the strongest cells are annotated (None disables them there).
+    - reorder: 'cluster' to order rows and columns by hierarchical clustering.
+    - heatmap_kwargs: sns.heatmap-style options (annot, fmt, cbar, linewidths, mask, ...; see
+      matrix.heatmap_options); other keys go to imshow.
     """
-    if heatmap_kwargs is None:
-        heatmap_kwargs = {}
-    
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.heatmap(data, xticklabels=x_labels, yticklabels=y_labels, cmap="coolwarm", annot=True, **heatmap_kwargs)
+    options = {'annot': annot, **heatmap_options(heatmap_kwargs)}
+
+    fig, ax = new_figure(figsize=figsize, ax=ax)
+    draw_matrix(ax, data, x_labels, y_labels, cmap="coolwarm", reorder=reorder, max_annot_cells=max_annot_cells,
+                **options)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
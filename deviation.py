@@ -1,9 +1,14 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
 
-def bar_diverging(data, labels, colors=('red', 'green'), figsize=(10, 6), bar_kwargs=None, vline_kwargs=None):
+from adapters import as_array, as_column
+from figures import finish, new_figure
+from palettes import sign_colors
+from profiling import profiled
+
+@profiled
+def bar_diverging(data, labels, colors=('red', 'green'), figsize=(10, 6), bar_kwargs=None, vline_kwargs=None, ax=None):
     """
     Creates a diverging bar chart with separate customization options for bars and vertical reference line.
     
@@ -14,14 +19,16 @@ def bar_diverging(data, labels, colors=('red', 'green'), figsize=(10, 6), bar_kw
     if vline_kwargs is None:
         vline_kwargs = {}
 
-    bar_colors = [colors[0] if val < 0 else colors[1] for val in data]
-    
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.barh(labels, data, color=bar_colors, **bar_kwargs)
+    data = as_array(data)
+    bar_colors = sign_colors(data, negative=colors[0], positive=colors[1])
+
+    fig, ax = new_figure(figsize=figsize, ax=ax)
+    ax.barh(as_column(labels), data, color=bar_colors, **bar_kwargs)
     ax.axvline(0, **vline_kwargs)
-    plt.show()
+    return finish(fig)
 
-def bar_diverging_stacked(data, categories, labels, xlabel='Percentage', title='Diverging Stacked Bar Chart', bar_kwargs=None):
+@profiled
+def bar_diverging_stacked(data, categories, labels, xlabel='Percentage', title='Diverging Stacked Bar Chart', bar_kwargs=None, ax=None):
     """
     Creates a diverging stacked bar chart for sentiment-based survey results.
     
@@ -30,15 +37,17 @@ def bar_diverging_stacked(data, categories, labels, xlabel='Percentage', title='
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    df = pd.DataFrame(data, index=categories, columns=labels)
-    df.plot(kind='barh', stacked=True, figsize=(8, 6), **bar_kwargs)
-    plt.axvline(0, color='black', linewidth=1)
-    plt.xlabel(xlabel)
-    plt.title(title)
-    plt.show()
+    df = pd.DataFrame(as_array(data), index=as_column(categories), columns=labels)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    df.plot(kind='barh', stacked=True, ax=ax, **bar_kwargs)
+    ax.axvline(0, color='black', linewidth=1)
+    ax.set_xlabel(xlabel)
+    ax.set_title(title)
+    return finish(fig)
 
 
-def spine_chart(categories, values1, values2, xlabel='Percentage', ylabel='Category', title='Spine Chart', bar_kwargs=None):
+@profiled
+def spine_chart(categories, values1, values2, xlabel='Percentage', ylabel='Category', title='Spine Chart', bar_kwargs=None, ax=None):
     """
     Creates a spine chart to compare two contrasting components (e.g., Male/Female).
     
@@ -47,21 +56,24 @@ def spine_chart(categories, values1, values2, xlabel='Percentage', ylabel='Categ
     if bar_kwargs is None:
         bar_kwargs = {}
     
+    values1 = as_array(values1)
+    values2 = as_array(values2)
     y = np.arange(len(categories))
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.barh(y, values1, color='blue', label='Group 1', **bar_kwargs)
-    ax.barh(y, -np.array(values2), color='orange', label='Group 2', **bar_kwargs)
+    ax.barh(y, -values2, color='orange', label='Group 2', **bar_kwargs)
     ax.axvline(0, color='black', linewidth=1)
     ax.set_yticks(y)
-    ax.set_yticklabels(categories)
+    ax.set_yticklabels(as_column(categories))
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
     ax.legend()
-    plt.show()
+    return finish(fig)
 
 
-def line_surplus_deficit_filled(x, y1, y2, xlabel='Time', ylabel='Value', title='Surplus/Deficit Filled Line Chart', fill_kwargs=None, line_kwargs=None):
+@profiled
+def line_surplus_deficit_filled(x, y1, y2, xlabel='Time', ylabel='Value', title='Surplus/Deficit Filled Line Chart', fill_kwargs=None, line_kwargs=None, ax=None):
     """
     Creates a line chart with shaded areas to visualize surplus/deficit balance.
     
@@ -72,7 +84,10 @@ def line_surplus_deficit_filled(x, y1, y2, xlabel='Time', ylabel='Value', title=
     if fill_kwargs is None:
         fill_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    x = as_column(x)
+    y1 = as_array(y1)
+    y2 = as_array(y2)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.plot(x, y1, label='Series 1', color='blue', **line_kwargs)
     ax.plot(x, y2, label='Series 2', color='red', **line_kwargs)
     ax.fill_between(x, y1, y2, where=(y1 >= y2), interpolate=True, color='blue', alpha=0.3, **fill_kwargs)
@@ -81,4 +96,4 @@ def line_surplus_deficit_filled(x, y1, y2, xlabel='Time', ylabel='Value', title=
     ax.set_ylabel(ylabel)
     ax.set_title(title)
     ax.legend()
-    plt.show()
+    return finish(fig)
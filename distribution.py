@@ -1,9 +1,17 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
 
-def histogram(data, bins=10, xlabel='Value', ylabel='Frequency', title='Histogram', hist_kwargs=None):
+from adapters import as_array, as_column
+from figures import finish, new_figure
+from labels import category_positions
+from profiling import phase, profiled
+
+# Unchunked microdata is binned this many rows at a time, which bounds the temporaries for memory-mapped columns.
+PYRAMID_CHUNK_ROWS = 1 << 22
+
+@profiled
+def histogram(data, bins=10, xlabel='Value', ylabel='Frequency', title='Histogram', hist_kwargs=None, ax=None):
     """
     Creates a histogram to show the distribution of a dataset.
     
@@ -12,73 +20,252 @@ def histogram(data, bins=10, xlabel='Value', ylabel='Frequency', title='Histogra
     if hist_kwargs is None:
         hist_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    # Lists of datasets are left as they are, so that ax.hist still draws one histogram per dataset.
+    if not (isinstance(data, (list, tuple)) and len(data) and np.ndim(data[0]) > 0):
+        data = as_array(data)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.hist(data, bins=bins, **hist_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def boxplot(data, labels=None, xlabel='Category', ylabel='Value', title='Boxplot', box_kwargs=None):
+@profiled
+def boxplot(data, labels=None, xlabel='Category', ylabel='Value', title='Boxplot', box_kwargs=None, ax=None):
     """
     Creates a boxplot to summarize distributions using median, quartiles, and range.
     """
     if box_kwargs is None:
         box_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.boxplot(data, labels=labels, **box_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def violin_plot(data, labels=None, xlabel='Category', ylabel='Value', title='Violin Plot', violin_kwargs=None):
+@profiled
+def violin_plot(data, labels=None, xlabel='Category', ylabel='Value', title='Violin Plot', violin_kwargs=None, ax=None):
     """
     Creates a violin plot, useful for displaying distributions with more detail than a boxplot.
     """
     if violin_kwargs is None:
         violin_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     sns.violinplot(data=data, ax=ax, **violin_kwargs)
     ax.set_xticklabels(labels)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def population_pyramid(male_values, female_values, age_groups, xlabel='Population', ylabel='Age Group', title='Population Pyramid', bar_kwargs=None):
+@profiled
+def population_pyramid(male_values, female_values, age_groups, xlabel='Population', ylabel='Age Group', title='Population Pyramid', bar_kwargs=None, ax=None,
+                       compare=None, group_labels=('Male', 'Female')):
     """
     Creates a histogram to show the distribution of a dataset.
     
     Best used for: Understanding the shape and spread of data (e.g., income distribution, population distribution).
+
+    Parameters:
+    - compare: {label: (male_values, female_values)} of other populations (e.g. earlier years),
+      drawn as bar outlines over the pyramid.
+    - group_labels: legend labels of the right (male_values) and left (female_values) sides.
     """
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.barh(age_groups, male_values, label='Male', **bar_kwargs)
-    ax.barh(age_groups, [-val for val in female_values], label='Female', **bar_kwargs)
+    age_groups = as_column(age_groups)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.barh(age_groups, as_array(male_values), label=group_labels[0], **bar_kwargs)
+    ax.barh(age_groups, -as_array(female_values), label=group_labels[1], **bar_kwargs)
+    for index, (label, (male, female)) in enumerate((compare or {}).items()):
+        color = f'C{index + 2}'
+        ax.barh(age_groups, as_array(male), fill=False, edgecolor=color, linewidth=1.2, label=str(label))
+        ax.barh(age_groups, -as_array(female), fill=False, edgecolor=color, linewidth=1.2)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
     ax.legend()
-    plt.show()
+    return finish(fig)
+
+def _factorize(values):
+    # Returns (unique values, index of each value among them); O(n) for small-range integer codes.
+    if values.dtype.kind in 'iu' and len(values):
+        low = int(values.min())
+        span = int(values.max()) - low + 1
+        if span <= 1 << 16:
+            present = np.bincount(values - low, minlength=span) > 0
+            lookup = np.cumsum(present) - 1
+            return np.flatnonzero(present) + low, lookup[values - low]
+    return np.unique(values, return_inverse=True)
+
+
+def _code_index(unique, known, fixed):
+    # Maps a chunk's unique values to stable indices, adding unseen values unless the set is fixed (-1 then).
+    if fixed:
+        return np.array([known.get(value, -1) for value in unique.tolist()], dtype=np.intp)
+    return np.array([known.setdefault(value, len(known)) for value in unique.tolist()], dtype=np.intp)
+
+
+def _age_edges(age_bins, max_age):
+    if np.ndim(age_bins) == 0:
+        return np.arange(0, max_age + 1, age_bins, dtype=float)
+    return np.asarray(age_bins, dtype=float)
+
+
+def age_labels(edges):
+    """
+    Returns labels such as '0-4', '5-9', ..., '100+' for age bins starting at each edge; the last bin is open-ended.
+    """
+    edges = np.asarray(edges, dtype=float)
+    whole = np.all(edges == np.round(edges))
+    labels = [f'{low:g}-{high - 1:g}' if whole else f'{low:g}-{high:g}' for low, high in zip(edges[:-1], edges[1:])]
+    return labels + [f'{edges[-1]:g}+']
+
+
+def pyramid_counts(ages=None, groups=None, weights=None, years=None, age_bins=5, max_age=100, group_values=None,
+                   normalize=None, chunks=None):
+    """
+    Counts microdata rows (e.g. census records) per age bin and group in a single vectorized pass.
+
+    Every row becomes one flat (year, group, age bin) cell index and all rows of a chunk are
+    counted with one weighted np.bincount, so memory-mapped or chunked inputs of hundreds of
+    millions of rows never go through a groupby.
+
+    Parameters:
+    - ages: age of each row; rows with a missing age or one below the first bin are skipped.
+    - groups: sex or other group of each row (codes or strings).
+    - weights: optional per-row weights (e.g. survey weights); without them every row counts as 1.
+    - years: optional per-row year (or any period) for multi-year comparisons.
+    - age_bins: bin width, or the array of bin start edges; the last bin is open-ended.
+    - max_age: start of the open-ended last bin when age_bins is a width.
+    - group_values: groups to count, in output order (e.g. (1, 2) or ('M', 'F')); others are skipped.
+      Defaults to every group present, sorted.
+    - normalize: None for counts, 'total' for percent of each year's population (pyramid shares),
+      'age' for percent split of each age bin between groups (spine_chart).
+    - chunks: iterable of (ages, groups[, weights[, years]]) tuples, for inputs that do not fit in memory.
+
+    Returns (counts, age_labels, group_labels, year_labels). counts has one row per group and one
+    column per age bin, so population_pyramid(*counts, age_labels) and
+    spine_chart(age_labels, *counts) work directly; with years it has a leading year axis and
+    year_labels lists the sorted years (otherwise None).
+    """
+    if normalize not in (None, 'total', 'age'):
+        raise ValueError("normalize must be None, 'total' or 'age'.")
+    edges = _age_edges(age_bins, max_age)
+    if chunks is None:
+        columns = [None if column is None else as_column(column) for column in (ages, groups, weights, years)]
+        chunks = (tuple(None if column is None else column[start:start + PYRAMID_CHUNK_ROWS] for column in columns)
+                  for start in range(0, len(columns[0]), PYRAMID_CHUNK_ROWS))
+
+    group_index = {value: index for index, value in enumerate(group_values or ())}
+    year_index = {}
+    counts = np.zeros((1, len(group_index), len(edges)))
+    for chunk in chunks:
+        chunk_ages, chunk_groups, chunk_weights, chunk_years = tuple(chunk) + (None,) * (4 - len(chunk))
+        chunk_ages = as_column(chunk_ages)
+        if chunk_ages.dtype.kind in 'iu' and np.ndim(age_bins) == 0 and float(age_bins).is_integer():
+            # Integer ages (the usual census coding) are binned without a float copy.
+            bins = np.minimum(chunk_ages // int(age_bins), len(edges) - 1).astype(np.intp)
+        elif np.ndim(age_bins) == 0:
+            bins = np.floor((as_array(chunk_ages) - edges[0]) / age_bins)
+            bins = np.minimum(np.where(np.isnan(bins), -1, bins), len(edges) - 1).astype(np.intp)
+        else:
+            chunk_ages = as_array(chunk_ages)
+            bins = np.where(np.isnan(chunk_ages), -1, np.searchsorted(edges, chunk_ages, side='right') - 1)
+        unique, inverse = _factorize(as_column(chunk_groups))
+        group = _code_index(unique, group_index, group_values is not None)[inverse]
+        if chunk_years is None:
+            year = np.zeros(len(bins), dtype=np.intp)
+        else:
+            unique, inverse = _factorize(as_column(chunk_years))
+            year = _code_index(unique, year_index, False)[inverse]
+
+        # Grow the year and group axes when a chunk brings values not seen so far.
+        shape = (max(len(year_index), 1), len(group_index), len(edges))
+        if shape != counts.shape:
+            counts = np.pad(counts, [(0, new - old) for new, old in zip(shape, counts.shape)])
+
+        cells = (year * shape[1] + group) * shape[2] + bins
+        chunk_weights = None if chunk_weights is None else as_array(chunk_weights)
+        keep = (bins >= 0) & (group >= 0)
+        if not keep.all():
+            cells = cells[keep]
+            chunk_weights = None if chunk_weights is None else chunk_weights[keep]
+        counts += np.bincount(cells, weights=chunk_weights, minlength=counts.size).reshape(shape)
+
+    group_labels = list(group_index)
+    if group_values is None:
+        order = np.argsort(np.array(group_labels, dtype=object)) if group_labels else np.arange(0)
+        counts = counts[:, order]
+        group_labels = [group_labels[index] for index in order]
+    year_labels = None
+    if years is not None or year_index:
+        year_labels = list(year_index)
+        order = np.argsort(np.array(year_labels, dtype=object))
+        counts = counts[order]
+        year_labels = [year_labels[index] for index in order]
+    else:
+        counts = counts[0]
+
+    if normalize is not None:
+        axis = (-2, -1) if normalize == 'total' else -2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            counts = counts / counts.sum(axis=axis, keepdims=True) * 100
+    return counts, age_labels(edges), group_labels, year_labels
+
+
+@profiled
+def population_pyramid_from_microdata(ages=None, groups=None, weights=None, years=None, year=None, age_bins=5,
+                                      max_age=100, group_values=None, normalize=None, chunks=None,
+                                      xlabel='Population', ylabel='Age Group', title='Population Pyramid',
+                                      bar_kwargs=None, ax=None, group_labels=None):
+    """
+    Creates a population pyramid straight from raw microdata rows, with other years as outlines.
+
+    Best used for: Age structure of census or survey records, and how it changed between years.
+
+    Parameters:
+    - ages, groups, weights, years, age_bins, max_age, group_values, normalize, chunks: see pyramid_counts.
+      The first two groups (in group_values order, sorted by default) are drawn on the right and
+      left sides and named by their values in the legend; pass group_values to choose them.
+    - group_labels: legend labels of the two sides, instead of the group values.
+    - year: year drawn as bars when years are given (defaults to the latest); the others are overlaid.
+    """
+    with phase('prepare'):
+        counts, labels, found, year_labels = pyramid_counts(ages, groups, weights, years, age_bins, max_age,
+                                                            group_values, normalize, chunks)
+    if len(found) < 2:
+        raise ValueError(f"A population pyramid needs two groups, found {found}.")
+    if group_labels is None:
+        group_labels = [str(group) for group in found[:2]]
+    compare = None
+    if year_labels is not None:
+        shown = year_labels.index(year) if year is not None else len(year_labels) - 1
+        compare = {label: counts[index][:2] for index, label in enumerate(year_labels) if index != shown}
+        counts = counts[shown]
+        title = f'{title} ({year_labels[shown]})'
+    return population_pyramid(counts[0], counts[1], labels, xlabel=xlabel, ylabel=ylabel, title=title,
+                              bar_kwargs=bar_kwargs, ax=ax, compare=compare, group_labels=group_labels)
 
-def dot_plot_strip(data, xlabel='Value', ylabel='Category', title='Dot Strip Plot', strip_kwargs=None):
+@profiled
+def dot_plot_strip(data, xlabel='Value', ylabel='Category', title='Dot Strip Plot', strip_kwargs=None, ax=None):
 
     if strip_kwargs is None:
         strip_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     sns.stripplot(data=data, ax=ax, **strip_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def dot_plot(categories, values, xlabel='Category', ylabel='Value', title='Dot Plot', dot_kwargs=None):
+@profiled
+def dot_plot(categories, values, xlabel='Category', ylabel='Value', title='Dot Plot', dot_kwargs=None, ax=None):
     """
     Creates a dot plot to show the range (min/max) of data across multiple categories.
 
@@ -87,14 +274,15 @@ def dot_plot(categories, values, xlabel='Category', ylabel='Value', title='Dot P
     if dot_kwargs is None:
         dot_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.scatter(categories, values, **dot_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.scatter(category_positions(ax, as_column(categories), 'x'), as_array(values), **dot_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def barcode_plot(data, xlabel='Value', ylabel='Frequency', title='Barcode Plot', barcode_kwargs=None):
+@profiled
+def barcode_plot(data, xlabel='Value', ylabel='Frequency', title='Barcode Plot', barcode_kwargs=None, ax=None):
     """
     Creates a barcode plot to visualize the distribution of individual data points.
 
@@ -103,14 +291,15 @@ def barcode_plot(data, xlabel='Value', ylabel='Frequency', title='Barcode Plot',
     if barcode_kwargs is None:
         barcode_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.vlines(data, ymin=0, ymax=1, **barcode_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.vlines(as_array(data), ymin=0, ymax=1, **barcode_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def cumulative_curve(data, xlabel='Value', ylabel='Cumulative Frequency', title='Cumulative Curve', curve_kwargs=None):
+@profiled
+def cumulative_curve(data, xlabel='Value', ylabel='Cumulative Frequency', title='Cumulative Curve', curve_kwargs=None, ax=None):
     """
     Creates a cumulative frequency curve.
     
@@ -119,12 +308,12 @@ def cumulative_curve(data, xlabel='Value', ylabel='Cumulative Frequency', title=
     if curve_kwargs is None:
         curve_kwargs = {}
     
-    sorted_data = np.sort(data)
+    sorted_data = np.sort(as_array(data))
     cumulative_freq = np.arange(1, len(data) + 1) / len(data)
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.plot(sorted_data, cumulative_freq, **curve_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
\ No newline at end of file
+    return finish(fig)
@@ -0,0 +1,214 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.ticker import FixedLocator, MaxNLocator
+
+from artists import bar_collection, bar_verts
+from figures import blank_figure, finish
+from profiling import phase, profiled
+
+FACET_KINDS = ('line', 'histogram', 'column')
+
+# Above this many panels the grid is drawn into a single Axes (see small_multiples).
+PACKED_THRESHOLD = 64
+
+
+def grid_shape(n_panels, ncols=None):
+    """
+    Returns (rows, cols) for a near-square grid holding n_panels panels.
+    """
+    if ncols is None:
+        ncols = math.ceil(math.sqrt(n_panels))
+    return math.ceil(n_panels / ncols), ncols
+
+
+def _prepare_panels(func, items, workers):
+    if workers is None or workers <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+def _panel_vertices(kind, values, x, edges, width=0.8):
+    # Geometry of one panel in its own data coordinates.
+    if kind == 'line':
+        return np.column_stack((np.arange(len(values)) if x is None else x, values))
+    if kind == 'histogram':
+        steps = np.empty((2 * len(values) + 2, 2))
+        steps[1:-1, 0] = np.repeat(edges, 2)[1:-1]
+        steps[1:-1, 1] = np.repeat(values, 2)
+        steps[0] = (edges[0], 0)
+        steps[-1] = (edges[-1], 0)
+        return steps
+    return bar_verts(np.arange(len(values)), values, width)
+
+
+def _limits(kind, panels, x, edges, positions):
+    if kind == 'column':
+        xlim = (-0.5, len(positions) - 0.5)
+    elif kind == 'histogram':
+        xlim = (edges[0], edges[-1])
+    elif x is None:
+        xlim = (0, max(len(values) for values in panels) - 1)
+    else:
+        xlim = (np.nanmin(x), np.nanmax(x))
+    ylim = (min(np.nanmin(values) for values in panels), max(np.nanmax(values) for values in panels))
+    if kind != 'line':
+        ylim = (min(ylim[0], 0), max(ylim[1], 0))
+    return xlim, ylim
+
+
+def _draw_axes_grid(fig, kind, panels, titles, x, edges, positions, categories, nrows, ncols,
+                    sharex, sharey, panel_kwargs):
+    # Axes are not linked through matplotlib's sharex/sharey, whose sibling lookups grow
+    # quadratically with the panel count; shared limits and ticks are applied explicitly instead.
+    axes = fig.subplots(nrows, ncols, squeeze=False)
+    fig.subplots_adjust(left=0.05, right=0.98, bottom=0.05, top=0.93, wspace=0.1, hspace=0.4)
+    used = axes.flat[:len(panels)]
+
+    for i, (ax, values) in enumerate(zip(used, panels)):
+        if kind == 'line':
+            ax.plot(np.arange(len(values)) if x is None else x, values, **panel_kwargs)
+        elif kind == 'histogram':
+            ax.stairs(values, edges, fill=True, **panel_kwargs)
+        else:
+            bar_collection(ax, positions[:len(values)], values, **panel_kwargs)
+        if titles is not None:
+            ax.set_title(titles[i], fontsize='small')
+
+    for ax in axes.flat[len(panels):]:
+        ax.set_visible(False)
+
+    xlim, ylim = _limits(kind, panels, x, edges, positions)
+    xticks = FixedLocator(positions if kind == 'column' else MaxNLocator(nbins=4).tick_values(*xlim))
+    yticks = FixedLocator(MaxNLocator(nbins=4).tick_values(*ylim))
+    for i, ax in enumerate(used):
+        if sharex:
+            ax.set_xlim(xlim)
+            ax.xaxis.set_major_locator(xticks)
+            if kind == 'column' and categories is not None:
+                ax.set_xticklabels(categories)
+            # Only the lowest panel of each column keeps its x tick labels.
+            ax.tick_params(labelbottom=i + ncols >= len(panels))
+        if sharey:
+            ax.set_ylim(ylim)
+            ax.yaxis.set_major_locator(yticks)
+            ax.tick_params(labelleft=i % ncols == 0)
+
+
+def _draw_packed_grid(fig, kind, panels, titles, x, edges, positions, categories, nrows, ncols,
+                      sharex, sharey, panel_kwargs, gap=0.15):
+    # Every panel lives in one unit cell of a single Axes, so the whole grid is a handful of
+    # collections rather than hundreds of Axes with their own tickers and artists.
+    ax = fig.add_axes((0.03, 0.03, 0.95, 0.9))
+    xlim, ylim = _limits(kind, panels, x, edges, positions)
+    size = 1 - gap
+
+    def cell_scale(i, values, verts):
+        row, col = divmod(i, ncols)
+        # Unshared axes follow the same per-kind limits as shared ones, computed for this panel alone.
+        own_positions = None if positions is None else positions[:len(values)]
+        own_xlim, own_ylim = (xlim, ylim) if sharex and sharey else _limits(kind, [values], x, edges, own_positions)
+        x0, x1 = xlim if sharex else own_xlim
+        y0, y1 = ylim if sharey else own_ylim
+        scaled = np.empty_like(verts)
+        scaled[..., 0] = col + (verts[..., 0] - x0) / ((x1 - x0) or 1) * size
+        scaled[..., 1] = (nrows - 1 - row) + (verts[..., 1] - y0) / ((y1 - y0) or 1) * size
+        return scaled
+
+    geometry = [cell_scale(i, values, _panel_vertices(kind, values, x, edges)) for i, values in enumerate(panels)]
+    if kind == 'line':
+        ax.add_collection(LineCollection(geometry, **panel_kwargs))
+    elif kind == 'histogram':
+        ax.add_collection(PolyCollection(geometry, **panel_kwargs))
+    else:
+        ax.add_collection(PolyCollection(np.concatenate(geometry), **panel_kwargs))
+
+    cells = np.array([divmod(i, ncols) for i in range(len(panels))])
+    frames = np.empty((len(panels), 4, 2))
+    frames[:, [0, 1], 0] = cells[:, 1:2]
+    frames[:, [2, 3], 0] = cells[:, 1:2] + size
+    frames[:, [0, 3], 1] = nrows - 1 - cells[:, 0:1]
+    frames[:, [1, 2], 1] = nrows - 1 - cells[:, 0:1] + size
+    ax.add_collection(PolyCollection(frames, facecolor='none', edgecolor='black', linewidth=0.5))
+
+    if titles is not None:
+        for (row, col), label in zip(cells, titles):
+            ax.text(col + size / 2, nrows - 1 - row + size, label, ha='center', va='bottom', fontsize='x-small')
+
+    # Shared tick labels are written once along the outer edges of the grid.
+    if sharey:
+        for value in MaxNLocator(nbins=3).tick_values(*ylim):
+            if ylim[0] <= value <= ylim[1]:
+                offset = (value - ylim[0]) / ((ylim[1] - ylim[0]) or 1) * size
+                for row in range(nrows):
+                    ax.text(-0.03, nrows - 1 - row + offset, f'{value:g}', ha='right', va='center', fontsize='xx-small')
+    if sharex:
+        ticks = positions if kind == 'column' else MaxNLocator(nbins=3).tick_values(*xlim)
+        labels = categories if kind == 'column' and categories is not None else [f'{value:g}' for value in ticks]
+        for value, label in zip(ticks, labels):
+            if xlim[0] <= value <= xlim[1]:
+                offset = (value - xlim[0]) / ((xlim[1] - xlim[0]) or 1) * size
+                for col in range(min(ncols, len(panels))):
+                    ax.text(col + offset, -0.03, label, ha='center', va='top', fontsize='xx-small')
+
+    ax.set_xlim(-0.1, ncols)
+    ax.set_ylim(-0.1, nrows)
+    ax.set_axis_off()
+
+
+@profiled
+def small_multiples(series, titles=None, kind='line', x=None, categories=None, bins=10, ncols=None,
+                    sharex=True, sharey=True, packed=None, panel_size=(2.0, 1.5), title='Small Multiples',
+                    workers=None, panel_kwargs=None):
+    """
+    Creates a small-multiples grid with one line, histogram or column panel per series in a single figure.
+
+    Best used for: Comparing the shape of many series of the same kind (e.g., one panel per region or SKU).
+
+    Parameters:
+    - series: mapping of title -> values, or a sequence of value arrays.
+    - kind: 'line', 'histogram' or 'column'.
+    - x: shared x values for line panels (defaults to the sample index).
+    - categories: shared category labels for column panels.
+    - bins: bin count or edges shared by every histogram panel.
+    - packed: draw all panels into a single Axes; defaults to True above PACKED_THRESHOLD panels.
+    - workers: number of threads used for per-panel data preparation.
+    """
+    if kind not in FACET_KINDS:
+        raise ValueError(f"kind must be one of {FACET_KINDS}.")
+    if panel_kwargs is None:
+        panel_kwargs = {}
+
+    if isinstance(series, dict):
+        titles = list(series.keys()) if titles is None else titles
+        series = list(series.values())
+    series = [np.asarray(values, dtype=float) for values in series]
+    if x is not None:
+        x = np.asarray(x, dtype=float)
+
+    edges = positions = None
+    if kind == 'histogram':
+        if np.ndim(bins) == 0:
+            low = min(np.nanmin(values) for values in series)
+            high = max(np.nanmax(values) for values in series)
+            bins = np.linspace(low, high, int(bins) + 1)
+        edges = np.asarray(bins, dtype=float)
+        with phase('prepare'):
+            panels = _prepare_panels(lambda values: np.histogram(values, bins=edges)[0].astype(float), series, workers)
+    else:
+        panels = series
+    if kind == 'column':
+        positions = np.arange(max(len(values) for values in panels))
+
+    if packed is None:
+        packed = len(panels) > PACKED_THRESHOLD
+    nrows, ncols = grid_shape(len(panels), ncols)
+    fig = blank_figure(figsize=(ncols * panel_size[0], nrows * panel_size[1]))
+    draw = _draw_packed_grid if packed else _draw_axes_grid
+    draw(fig, kind, panels, titles, x, edges, positions, categories, nrows, ncols, sharex, sharey, panel_kwargs)
+
+    fig.suptitle(title)
+    return finish(fig)
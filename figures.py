@@ -0,0 +1,83 @@
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import Collection
+from matplotlib.figure import Figure
+
+# Charts are built on Figure objects that carry their own Agg canvas instead of going through
+# pyplot, whose current-figure bookkeeping is global state shared by every thread. Each chart
+# call owns its figure, so charts can be rendered concurrently from a thread pool, saved with
+# fig.savefig(...), or displayed directly by Jupyter.
+
+# Data layers with more elements (points, paths, line markers or bar patches) than this are
+# rasterized when saved to SVG/PDF/EPS, while axes, text and annotations stay vector.
+RASTERIZE_THRESHOLD = 5000
+
+_settings = {'rasterize_threshold': RASTERIZE_THRESHOLD}
+
+
+def set_rasterize_threshold(threshold):
+    """
+    Sets the element count above which finish() rasterizes a data layer; None turns it off.
+    """
+    _settings['rasterize_threshold'] = threshold
+
+
+def _element_count(artist):
+    if isinstance(artist, Collection):
+        return max(len(artist.get_offsets()), len(artist.get_paths()))
+    # Plain lines are already simplified to roughly one vertex per pixel by the vector backends,
+    # so only lines drawing a marker at every point count as dense.
+    if artist.get_marker() in (None, 'None', 'none', '', ' '):
+        return 0
+    return len(artist.get_xydata())
+
+
+def rasterize_dense(fig, threshold=None):
+    """
+    Marks the dense data layers of every Axes as rasterized and returns how many were marked.
+
+    Collections count their points or paths and marker lines their points; patches added one
+    by one (e.g. by ax.bar) are rasterized together once an Axes holds more than `threshold` of
+    them. Raster layers are drawn at the dpi passed to savefig, so vector files stay sharp at
+    that size.
+    """
+    if threshold is None:
+        threshold = _settings['rasterize_threshold']
+    if threshold is None:
+        return 0
+    marked = 0
+    for ax in fig.axes:
+        dense = [artist for artist in (*ax.collections, *ax.lines) if _element_count(artist) > threshold]
+        if len(ax.patches) > threshold:
+            dense.extend(ax.patches)
+        for artist in dense:
+            artist.set_rasterized(True)
+        marked += len(dense)
+    return marked
+
+
+def blank_figure(figsize=None):
+    """
+    Creates a Figure attached to its own Agg canvas, without registering it with pyplot.
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def new_figure(figsize=None, ax=None, nrows=1, ncols=1, **subplots_kwargs):
+    """
+    Returns (fig, ax) for a chart: the figure of `ax` when one is passed in, otherwise a new
+    pyplot-free Figure with an nrows x ncols grid of Axes created by Figure.subplots.
+    """
+    if ax is not None:
+        return ax.figure, ax
+    fig = blank_figure(figsize)
+    return fig, fig.subplots(nrows, ncols, **subplots_kwargs)
+
+
+def finish(fig):
+    """
+    Final step of every chart function: rasterizes dense data layers and returns the figure.
+    """
+    rasterize_dense(fig)
+    return fig
@@ -1,25 +1,31 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 import networkx as nx
 import numpy as np
 from matplotlib.sankey import Sankey
 import seaborn as sns
 
-def sankey_chart(flows, labels, title='Sankey Diagram'):
+from adapters import as_array, as_column
+from figures import finish, new_figure
+from palettes import sign_colors
+from profiling import profiled
+
+@profiled
+def sankey_chart(flows, labels, title='Sankey Diagram', ax=None):
     """
     Creates a Sankey diagram to show flow between multiple conditions.
     
     Best used for: Visualizing transitions between states, such as financial flows or process changes.
     """
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     sankey = Sankey(ax=ax, unit=None)
-    for flow, label in zip(flows, labels):
+    for flow, label in zip(as_array(flows), as_column(labels)):
         sankey.add(flows=[flow], labels=[label])
     sankey.finish()
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def waterfall_chart(categories, values, xlabel='Category', ylabel='Value', title='Waterfall Chart', bar_kwargs=None):
+@profiled
+def waterfall_chart(categories, values, xlabel='Category', ylabel='Value', title='Waterfall Chart', bar_kwargs=None, ax=None):
     """
     Creates a waterfall chart to show sequential changes in data, including positive and negative components.
     
@@ -28,47 +34,51 @@ def waterfall_chart(categories, values, xlabel='Category', ylabel='Value', title
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    running_total = np.cumsum([0] + values[:-1])
-    fig, ax = plt.subplots(figsize=(8, 6))
-    colors = ['green' if v >= 0 else 'red' for v in values]
-    ax.bar(categories, values, bottom=running_total, color=colors, **bar_kwargs)
+    values = as_array(values)
+    running_total = np.concatenate(([0.0], np.cumsum(values[:-1])))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    colors = sign_colors(values, negative='red', positive='green')
+    ax.bar(as_column(categories), values, bottom=running_total, color=colors, **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def chord_diagram(matrix, labels, title='Chord Diagram'):
+@profiled
+def chord_diagram(matrix, labels, title='Chord Diagram', ax=None):
     """
     Creates a chord diagram to visualize 2-way flows between multiple categories.
     
     Best used for: Displaying relationships in a matrix, such as trade flows or connectivity.
     """
-    fig, ax = plt.subplots(figsize=(8, 8))
+    fig, ax = new_figure(figsize=(8, 8), ax=ax)
+    matrix = as_array(matrix)
+    labels = as_column(labels)
+    rows, cols = np.nonzero(matrix > 0)
+    weights = matrix[rows, cols]
     G = nx.DiGraph()
-    for i, label in enumerate(labels):
-        for j, value in enumerate(matrix[i]):
-            if value > 0:
-                G.add_edge(labels[i], labels[j], weight=value)
-    
+    G.add_weighted_edges_from(zip(labels[rows], labels[cols], weights))
+
     pos = nx.circular_layout(G)
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', arrows=True)
-    edge_labels = {(labels[i], labels[j]): matrix[i][j] for i in range(len(labels)) for j in range(len(labels)) if matrix[i][j] > 0}
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
+    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', arrows=True, ax=ax)
+    edge_labels = dict(zip(zip(labels[rows], labels[cols]), weights))
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, ax=ax)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def network_graph(edges, title='Network Graph'):
+@profiled
+def network_graph(edges, title='Network Graph', ax=None):
     """
     Creates a network graph to show interconnected relationships.
     
     Best used for: Visualizing relationships, such as trade partners, citations, or social networks.
     """
-    fig, ax = plt.subplots(figsize=(8, 8))
+    fig, ax = new_figure(figsize=(8, 8), ax=ax)
     G = nx.Graph()
     G.add_edges_from(edges)
     pos = nx.spring_layout(G)
     nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', ax=ax)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
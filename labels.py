@@ -0,0 +1,146 @@
+import math
+import threading
+from functools import lru_cache
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.font_manager import FontProperties, findfont, get_font
+from matplotlib.ticker import Formatter, Locator
+
+# Only this many of the longest labels are measured to find the widest one.
+MEASURED_LABELS = 64
+
+# FreeType font objects are shared per font file, so measuring is serialised across threads.
+_font_lock = threading.Lock()
+
+
+def declutter(positions, min_gap):
+    """
+    Spreads 1-D label positions so that neighbours end up at least min_gap apart.
+
+    Labels are sorted once (O(n log n)); overlaps are then resolved by an upward and a
+    downward sweep, each a cumulative max/min, and the two are averaged so that labels
+    move as little as possible. Returns the new positions in input order.
+    """
+    positions = np.asarray(positions, dtype=float)
+    order = np.argsort(positions, kind='stable')
+    ordered = positions[order]
+    offsets = np.arange(len(ordered)) * min_gap
+
+    # Sweep i keeps label i at least i*min_gap above label 0, which becomes a running max/min.
+    pushed_up = np.maximum.accumulate(ordered - offsets) + offsets
+    pushed_down = np.minimum.accumulate((ordered - offsets)[::-1])[::-1] + offsets
+
+    spread = np.empty_like(positions)
+    spread[order] = (pushed_up + pushed_down) / 2
+    return spread
+
+
+def text_gap(ax, fontsize='small', axis='y', spacing=1.2):
+    """
+    Returns the height of one line of text at `fontsize`, in data units along `axis`.
+    """
+    size_points = FontProperties(size=fontsize).get_size_in_points() * spacing
+    bbox = ax.get_window_extent()
+    low, high = ax.get_ylim() if axis == 'y' else ax.get_xlim()
+    length_pixels = bbox.height if axis == 'y' else bbox.width
+    return abs(high - low) * size_points * ax.figure.dpi / 72 / length_pixels
+
+
+@lru_cache(maxsize=65536)
+def text_extent(text, fontsize):
+    """
+    Returns the (width, height) in points of one line of text in the default font, measured once per text and size.
+    """
+    with _font_lock:
+        font = get_font(findfont(FontProperties()))
+        font.set_size(fontsize, 72)
+        font.set_text(text, 0.0)
+        width, height = font.get_width_height()
+    return width / 64, height / 64
+
+
+def widest_label(labels, fontsize):
+    """
+    Returns the width in points of the widest label, measuring only the MEASURED_LABELS longest strings.
+    """
+    labels = np.asarray(labels).astype(str)
+    if not len(labels):
+        return 0.0
+    lengths = np.char.str_len(labels)
+    longest = np.argpartition(-lengths, MEASURED_LABELS)[:MEASURED_LABELS] if len(labels) > MEASURED_LABELS \
+        else np.arange(len(labels))
+    return max(text_extent(str(label), fontsize)[0] for label in labels[longest])
+
+
+class CategoryLocator(Locator):
+    """
+    Ticks every k-th category of a virtual category axis, with k chosen at draw time so labels do not overlap.
+
+    Categories sit at positions 0..n-1 (plus offset). Only the categories in view get a tick, and
+    the stride is a multiple that keeps ticks fixed while panning, so an axis with 20k
+    categories draws a few dozen tick labels instead of 20k.
+    """
+
+    def __init__(self, n_categories, extent, offset=0.0, pad=1.5):
+        self.n_categories = n_categories
+        self.extent = extent
+        self.offset = offset
+        self.pad = pad
+
+    def __call__(self):
+        low, high = sorted(self.axis.get_view_interval())
+        first = max(math.ceil(low - self.offset), 0)
+        last = min(math.floor(high - self.offset), self.n_categories - 1)
+        if last < first or high <= low:
+            return []
+        bbox = self.axis.axes.bbox
+        length = bbox.width if self.axis.axis_name == 'x' else bbox.height
+        pixels_per_category = length / (high - low)
+        extent = self.extent * self.axis.figure.dpi / 72 * self.pad
+        stride = max(math.ceil(extent / pixels_per_category), 1) if pixels_per_category > 0 else self.n_categories
+        return np.arange(math.ceil(first / stride) * stride, last + 1, stride) + self.offset
+
+
+class CategoryFormatter(Formatter):
+    """
+    Labels the ticks of a virtual category axis with the category at each position.
+    """
+
+    def __init__(self, labels, offset=0.0):
+        self.labels = labels
+        self.offset = offset
+
+    def __call__(self, value, pos=None):
+        index = round(value - self.offset)
+        return str(self.labels[index]) if 0 <= index < len(self.labels) else ''
+
+
+def category_positions(ax, categories, axis='x', offset=0.0):
+    """
+    Maps categories onto a virtual category axis and returns their numeric positions.
+
+    String categories get positions 0..n-1 in order of first appearance (repeats share one, as
+    on Matplotlib's category axis), and the axis gets a CategoryLocator/CategoryFormatter pair
+    that thins the tick labels to what fits, measured with cached text extents. Numeric and
+    date categories are returned unchanged, since their axes already thin ticks.
+
+    Parameters:
+    - offset: shift of the tick from the category position (e.g. the centre of a bar group).
+    """
+    categories = np.asarray(categories)
+    if categories.dtype.kind not in 'OUS':
+        return categories
+    categories = categories.astype(str)
+    unique, first_index, inverse = np.unique(categories, return_index=True, return_inverse=True)
+    order = np.argsort(first_index)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    labels = unique[order]
+
+    target = ax.xaxis if axis == 'x' else ax.yaxis
+    fontsize = FontProperties(size=rcParams[f'{axis}tick.labelsize']).get_size_in_points()
+    extent = widest_label(labels, fontsize) if axis == 'x' else fontsize * 1.2
+    target.set_major_locator(CategoryLocator(len(labels), extent, offset))
+    target.set_major_formatter(CategoryFormatter(labels, offset))
+    return rank[inverse].astype(float)
@@ -1,9 +1,23 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
+from matplotlib import rcParams
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import LogNorm
+from matplotlib.patches import Patch
 
-def column_chart(categories, values, xlabel='Category', ylabel='Value', title='Column Chart', bar_kwargs=None):
+from adapters import as_array, as_column
+from artists import bar_collection, icon_marker
+from change_in_time import priestley_timeline as _priestley_timeline
+from clustering import draw_proportional_symbols
+from facet import grid_shape
+from figures import blank_figure, finish, new_figure
+from labels import category_positions
+from palettes import continuous_colors, get_cmap, parse_color
+from profiling import phase, profiled
+
+@profiled
+def column_chart(categories, values, xlabel='Category', ylabel='Value', title='Column Chart', bar_kwargs=None, ax=None):
     """
     Creates a standard column chart to compare the size of things.
     
@@ -12,30 +26,47 @@ def column_chart(categories, values, xlabel='Category', ylabel='Value', title='C
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.bar(categories, values, **bar_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.bar(category_positions(ax, as_column(categories), 'x'), as_array(values), **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def bar_chart(categories, values, xlabel='Value', ylabel='Category', title='Bar Chart', bar_kwargs=None):
+@profiled
+def bar_chart(categories, values, xlabel='Value', ylabel='Category', title='Bar Chart', bar_kwargs=None, ax=None):
     """
     Creates a horizontal bar chart, useful for long category names.
     """
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.barh(categories, values, **bar_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.barh(category_positions(ax, as_column(categories), 'y'), as_array(values), **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
+
+
+def _grouped_bars(ax, data, categories, labels, axis, bar_kwargs, width=0.3):
+    # Every series of a grouped bar chart goes into one bar collection, coloured per series from
+    # the property cycle, with Patch proxies standing in for the series in the legend.
+    values = np.column_stack([as_array(data[label]) for label in labels])
+    positions = category_positions(ax, as_column(categories).astype(str), axis, offset=(len(labels) - 1) * width / 2)
+    positions = positions[:, None] + np.arange(len(labels)) * width
+    series_colors = [parse_color(color) for color in rcParams['axes.prop_cycle'].by_key()['color']]
+    colors = np.array([series_colors[i % len(series_colors)] for i in range(len(labels))])
+    bar_collection(ax, positions.ravel(), values.ravel(), width=width, horizontal=axis == 'y',
+                   facecolors=np.tile(colors, (len(categories), 1)), **bar_kwargs)
+    # loc='best' scans every bar for free space, which is slow once there are thousands of them.
+    ax.legend(handles=[Patch(facecolor=color, label=label) for color, label in zip(colors, labels)],
+              loc='best' if values.size <= 1000 else 'upper right')
 
 
-def column_grouped(data, categories, labels, xlabel='Category', ylabel='Value', title='Grouped Column Chart', bar_kwargs=None):
+@profiled
+def column_grouped(data, categories, labels, xlabel='Category', ylabel='Value', title='Grouped Column Chart', bar_kwargs=None, ax=None):
     """
     Creates a grouped column chart for multiple series comparison.
     
@@ -44,22 +75,16 @@ def column_grouped(data, categories, labels, xlabel='Category', ylabel='Value',
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    x = np.arange(len(categories))
-    width = 0.3
-    fig, ax = plt.subplots(figsize=(8, 6))
-    for i, label in enumerate(labels):
-        ax.bar(x + i * width, data[label], width=width, label=label, **bar_kwargs)
-    
-    ax.set_xticks(x + width / 2)
-    ax.set_xticklabels(categories)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    _grouped_bars(ax, data, categories, labels, 'x', bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    ax.legend()
-    plt.show()
+    return finish(fig)
 
 
-def bar_grouped(data, categories, labels, xlabel='Value', ylabel='Category', title='Grouped Bar Chart', bar_kwargs=None):
+@profiled
+def bar_grouped(data, categories, labels, xlabel='Value', ylabel='Category', title='Grouped Bar Chart', bar_kwargs=None, ax=None):
     """
     Creates a grouped bar chart for comparing multiple series within categories.
 
@@ -68,40 +93,40 @@ def bar_grouped(data, categories, labels, xlabel='Value', ylabel='Category', tit
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    y = np.arange(len(categories))
-    width = 0.3
-    fig, ax = plt.subplots(figsize=(8, 6))
-    for i, label in enumerate(labels):
-        ax.barh(y + i * width, data[label], height=width, label=label, **bar_kwargs)
-    
-    ax.set_yticks(y + width / 2)
-    ax.set_yticklabels(categories)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    _grouped_bars(ax, data, categories, labels, 'y', bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    ax.legend()
-    plt.show()
+    return finish(fig)
 
 
-def symbol_proportional(categories, values, xlabel='Category', ylabel='Value', title='Proportional Symbol Chart', scatter_kwargs=None):
+@profiled
+def symbol_proportional(categories, values, xlabel='Category', ylabel='Value', title='Proportional Symbol Chart', scatter_kwargs=None, ax=None, size_factor=10, cluster='auto'):
     """
     Creates a proportional symbol chart where symbol size represents value magnitude.
 
     Best used for: Highlighting large variations where precise differences are not critical.
+
+    Parameters:
+    - size_factor: marker area in points^2 per unit of value.
+    - cluster: merge overlapping symbols into summed ones (see clustering.cluster_symbols);
+      'auto' does so above clustering.CLUSTER_THRESHOLD values.
     """
     if scatter_kwargs is None:
         scatter_kwargs = {}
     
-    sizes = np.array(values) * 10  # Scale values for visualization
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.scatter(categories, values, s=sizes, **scatter_kwargs)
+    values = as_array(values)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    draw_proportional_symbols(ax, as_column(categories), values, values, size_factor, cluster=cluster, **scatter_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def lollipop_chart(categories, values, xlabel='Category', ylabel='Value', title='Lollipop Chart', lollipop_kwargs=None):
+@profiled
+def lollipop_chart(categories, values, xlabel='Category', ylabel='Value', title='Lollipop Chart', lollipop_kwargs=None, ax=None):
     """
     Creates a lollipop chart to emphasize data points with vertical lines and markers.
 
@@ -110,37 +135,140 @@ def lollipop_chart(categories, values, xlabel='Category', ylabel='Value', title=
     if lollipop_kwargs is None:
         lollipop_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.vlines(categories, 0, values, **lollipop_kwargs)
-    ax.scatter(categories, values, color='red', zorder=3)
+    categories = as_column(categories)
+    values = as_array(values)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    positions = category_positions(ax, categories, 'x')
+    ax.vlines(positions, 0, values, **lollipop_kwargs)
+    ax.scatter(positions, values, color='red', zorder=3)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def radar_chart(data, categories, title='Radar Chart', radar_kwargs=None):
+@profiled
+def radar_chart(data, categories, title='Radar Chart', radar_kwargs=None, labels=None, normalize=None,
+                small_multiples=False, ncols=None, cmap='tab10', ax=None):
     """
     Creates a radar chart to display multiple variables in a circular layout.
 
     Best used for: Comparing multiple attributes of different entities in a space-efficient way.
+
+    Parameters:
+    - data: one value per category, or a 2D array with one row per entity.
+    - labels: entity names, shown in the legend (up to 10 entities) or as panel titles.
+    - normalize: None, 'minmax' to scale every metric to 0-1 across entities, or 'max' to divide by the metric maximum.
+    - small_multiples: draw one small radar per entity in a single packed grid instead of overlaying them.
+      The grid is drawn on Cartesian axes, so an `ax` passed along must not be a polar one.
     """
     if radar_kwargs is None:
         radar_kwargs = {}
-    
-    angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False).tolist()
-    values = data + data[:1]
-    angles += angles[:1]
-    
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-    ax.fill(angles, values, alpha=0.3, **radar_kwargs)
-    ax.plot(angles, values, **radar_kwargs)
-    ax.set_xticks(angles[:-1])
+
+    data = np.atleast_2d(as_array(data))
+    categories = as_column(categories)
+    if normalize == 'minmax':
+        low = np.nanmin(data, axis=0)
+        span = np.nanmax(data, axis=0) - low
+        data = (data - low) / np.where(span > 0, span, 1)
+    elif normalize == 'max':
+        peak = np.nanmax(np.abs(data), axis=0)
+        data = data / np.where(peak > 0, peak, 1)
+    elif normalize is not None:
+        raise ValueError("normalize must be None, 'minmax' or 'max'.")
+
+    # Close every polygon at once by repeating the first metric at the end of each row.
+    angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False)
+    closed_angles = np.append(angles, angles[0])
+    closed = np.concatenate((data, data[:, :1]), axis=1)
+    colors = get_cmap(cmap)(np.arange(len(data)) % get_cmap(cmap).N)
+    fill_alpha = 0.3 if len(data) <= 10 else 0.05
+
+    if small_multiples:
+        return _radar_grid(closed, closed_angles, categories, labels, colors, fill_alpha, ncols, title, radar_kwargs,
+                           ax=ax)
+
+    verts = np.empty(closed.shape + (2,))
+    verts[..., 0] = closed_angles
+    verts[..., 1] = closed
+    fills, colors, radar_kwargs = _radar_style(colors, fill_alpha, radar_kwargs)
+
+    fig, ax = new_figure(figsize=(8, 8), subplot_kw=dict(polar=True), ax=ax)
+    ax.add_collection(PolyCollection(verts, **{'facecolors': fills, 'edgecolors': colors, **radar_kwargs}))
+    # The radial axis always includes 0, also when every value is negative.
+    low, high = min(0, np.nanmin(data)), max(0, np.nanmax(data))
+    ax.set_ylim(low, high + 0.05 * ((high - low) or 1))
+    ax.set_xticks(angles)
     ax.set_xticklabels(categories)
+    if labels is not None and len(data) <= 10:
+        ax.legend(handles=[Patch(facecolor=fill, edgecolor=color, label=label)
+                           for fill, color, label in zip(fills, colors, labels)],
+                  loc='upper right', bbox_to_anchor=(1.1, 1.1))
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
+
+def _radar_style(colors, fill_alpha, radar_kwargs):
+    # radar_kwargs used to go to both ax.fill(alpha=0.3) and ax.plot, so a color sets the outline
+    # and the translucent fill of every entity, and an alpha only applies to the outline.
+    radar_kwargs = dict(radar_kwargs)
+    color = radar_kwargs.pop('color', None)
+    alpha = radar_kwargs.pop('alpha', None)
+    edges = colors.copy()
+    if color is not None:
+        edges[:] = parse_color(color)
+    fills = edges.copy()
+    fills[:, 3] = fill_alpha
+    if alpha is not None:
+        edges[:, 3] = alpha
+    return fills, edges, radar_kwargs
+
+def _radar_grid(closed, closed_angles, categories, labels, colors, fill_alpha, ncols, title, radar_kwargs, size=0.8,
+                ax=None):
+    # Every radar lives in one unit cell of a single Cartesian Axes, so hundreds of entities
+    # become three collections rather than hundreds of polar Axes.
+    nrows, ncols = grid_shape(len(closed), ncols)
+    radius = size / 2
+    scale = radius / (np.nanmax(np.abs(closed)) or 1)
+    cells = np.divmod(np.arange(len(closed)), ncols)
+    centers = np.column_stack((cells[1] + 0.5, nrows - 1 - cells[0] + 0.5))
+
+    verts = centers[:, None, :] + (closed * scale)[..., None] * np.column_stack((np.cos(closed_angles), np.sin(closed_angles)))
+    fills, colors, radar_kwargs = _radar_style(colors, max(fill_alpha, 0.3), radar_kwargs)
+
+    spokes = np.column_stack((np.cos(closed_angles[:-1]), np.sin(closed_angles[:-1]))) * radius
+    frame = np.empty((len(closed), len(spokes), 2, 2))
+    frame[:, :, 0] = centers[:, None, :]
+    frame[:, :, 1] = centers[:, None, :] + spokes
+    rings = centers[:, None, :] + np.vstack((spokes, spokes[:1]))
+
+    if ax is None:
+        fig = blank_figure(figsize=(ncols * 1.8, nrows * 1.8))
+        ax = fig.add_axes((0.02, 0.02, 0.96, 0.9))
+    elif ax.name == 'polar':
+        raise ValueError("radar_chart small multiples need a Cartesian Axes, not a polar one.")
+    else:
+        fig = ax.figure
+    ax.add_collection(LineCollection(frame.reshape(-1, 2, 2), colors='lightgray', linewidths=0.5))
+    ax.add_collection(LineCollection(rings, colors='lightgray', linewidths=0.5))
+    ax.add_collection(PolyCollection(verts, **{'facecolors': fills, 'edgecolors': colors, **radar_kwargs}))
+
+    # Metric names are written once, around the first panel.
+    for (dx, dy), category in zip(spokes, categories):
+        ax.text(centers[0, 0] + dx * 1.05, centers[0, 1] + dy * 1.05, str(category), fontsize='xx-small',
+                ha='left' if dx > 1e-9 else 'right' if dx < -1e-9 else 'center', va='center')
+    if labels is not None:
+        for (x, y), label in zip(centers, as_column(labels)):
+            ax.text(x, y - radius * 1.3, str(label), ha='center', va='top', fontsize='x-small')
 
-def bar_stacked_proportional(data, categories, labels, xlabel='Percentage', ylabel='Category', title='Stacked Proportional Bar Chart', bar_kwargs=None):
+    ax.set_xlim(0, ncols)
+    ax.set_ylim(-0.1, nrows)
+    ax.set_aspect('equal')
+    ax.set_axis_off()
+    fig.suptitle(title)
+    return finish(fig)
+
+@profiled
+def bar_stacked_proportional(data, categories, labels, xlabel='Percentage', ylabel='Category', title='Stacked Proportional Bar Chart', bar_kwargs=None, ax=None):
     """
     Creates a stacked proportional bar chart where values are normalized to percentages.
 
@@ -149,32 +277,85 @@ def bar_stacked_proportional(data, categories, labels, xlabel='Percentage', ylab
     if bar_kwargs is None:
         bar_kwargs = {}
 
-    df = pd.DataFrame(data, index=categories, columns=labels)
-    df = df.div(df.sum(axis=1), axis=0)  # Normalize to proportions
+    with phase('prepare'):
+        data = as_array(data)
+        data = data / data.sum(axis=1, keepdims=True)  # Normalize to proportions
+        df = pd.DataFrame(data, index=as_column(categories), columns=labels)
 
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     df.plot(kind='barh', stacked=True, ax=ax, **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
     ax.legend()
-    plt.show()
+    return finish(fig)
 
-def isotope_pictogram(values, labels, symbol='🔵', title='Isotope (Pictogram) Chart'):
+@profiled
+def isotope_pictogram(values, labels, symbol='circle', title='Isotope (Pictogram) Chart', unit=None, per_row=None,
+                      max_icons=2000, scatter_kwargs=None, ax=None):
     """
     Creates an isotope (pictogram) chart using icons to represent whole-number counts.
 
     Best used for: Intuitive representation of quantities using symbols; only applicable to discrete values.
+
+    Parameters:
+    - symbol: icon for every unit: a Matplotlib marker, 'circle', 'square', 'triangle', 'person' or a text glyph.
+    - unit: value represented by one icon. None keeps one icon per unit and requires whole numbers;
+      'auto' picks a 1-2-5 step so that at most max_icons icons are drawn; values are rounded to whole icons.
+    - per_row: icons per row before wrapping (defaults to a roughly balanced grid for the total icon count).
     """
-    if any(v % 1 != 0 for v in values):
-        raise ValueError("Isotope pictograms should only use whole numbers.")
+    if scatter_kwargs is None:
+        scatter_kwargs = {}
+
+    values = as_array(values)
+    if unit is None:
+        if np.any(values % 1 != 0):
+            raise ValueError("Isotope pictograms should only use whole numbers.")
+        unit = 1
+    elif unit == 'auto':
+        unit = _icon_unit(values.sum(), max_icons)
+    counts = np.rint(values / unit).astype(np.intp)
 
-    for label, value in zip(labels, values):
-        print(f"{label}: {' '.join([symbol] * int(value))}")
+    if per_row is None:
+        per_row = max(10, int(np.ceil(np.sqrt(counts.sum()) * 1.5)))
+    lines = np.maximum(-(-counts // per_row), 1)
+    # Top line of each category, counted downwards, with a blank line between categories.
+    first_line = np.concatenate(([0], np.cumsum(lines + 1)[:-1]))
 
-    print(f"\n{title}")
+    category = np.repeat(np.arange(len(counts)), counts)
+    index = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    x = index % per_row
+    y = -(first_line[category] + index // per_row)
 
-def bullet_chart(value, target, xlabel='Value', title='Bullet Chart', bar_kwargs=None, target_kwargs=None):
+    # Icons shrink once a row would no longer fit into a 12 inch wide figure.
+    cell = min(0.3, 12 / per_row)
+    colors = get_cmap('tab10')(category % 10)
+    fig, ax = new_figure(figsize=(per_row * cell + 2, (first_line[-1] + lines[-1]) * cell + 1), ax=ax)
+    ax.scatter(x, y, **{'marker': icon_marker(symbol), 'c': colors, 's': (cell * 72 * 0.6) ** 2, 'linewidths': 0,
+                        **scatter_kwargs})
+    ax.set_yticks(-first_line)
+    ax.set_yticklabels(as_column(labels))
+    ax.set_xticks([])
+    ax.set_xlim(-1, per_row)
+    ax.set_ylim(-(first_line[-1] + lines[-1]), 1)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    if unit != 1:
+        ax.set_xlabel(f'One icon = {unit:g} units')
+    ax.set_title(title)
+    return finish(fig)
+
+def _icon_unit(total, max_icons):
+    # Smallest 1-2-5 step that keeps the total icon count within max_icons.
+    if total <= max_icons:
+        return 1
+    magnitude = 10 ** np.floor(np.log10(total / max_icons))
+    for step in (1, 2, 5, 10):
+        if total / (step * magnitude) <= max_icons:
+            return step * magnitude
+
+@profiled
+def bullet_chart(value, target, xlabel='Value', title='Bullet Chart', bar_kwargs=None, target_kwargs=None, ax=None):
     """
     Creates a bullet chart to compare performance values against a target.
 
@@ -185,30 +366,110 @@ def bullet_chart(value, target, xlabel='Value', title='Bullet Chart', bar_kwargs
     if target_kwargs is None:
         target_kwargs = {'color': 'red', 'linewidth': 2}
 
-    fig, ax = plt.subplots(figsize=(8, 2))
+    fig, ax = new_figure(figsize=(8, 2), ax=ax)
     ax.barh(0, value, height=0.4, **bar_kwargs)
     ax.axvline(target, **target_kwargs)
     ax.set_yticks([])
     ax.set_xlabel(xlabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def priestley_timeline(events, durations, xlabel='Time', ylabel='Events', title='Priestley Timeline', bar_kwargs=None):
+@profiled
+def priestley_timeline(events, durations, xlabel='Time', ylabel='Events', title='Priestley Timeline', bar_kwargs=None,
+                       pack=False, window=None, ax=None):
     """
     Creates a Priestley timeline for date and duration visualization.
 
     Best used for: Highlighting date and duration relationships.
+
+    Same chart as change_in_time.priestley_timeline, which draws it; see there for the parameters.
     """
-    if bar_kwargs is None:
-        bar_kwargs = {}
+    return _priestley_timeline(events, durations, xlabel=xlabel, ylabel=ylabel, title=title, bar_kwargs=bar_kwargs,
+                               pack=pack, window=window, ax=ax)
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    for i, (start, end) in enumerate(durations):
-        ax.barh(i, end - start, left=start, **bar_kwargs)
-    
-    ax.set_yticks(range(len(events)))
-    ax.set_yticklabels(events)
+def _pair_density(left, right, height, width):
+    # Every row draws a straight segment from `left` to `right`. Rows are first binned into
+    # (left bin, right bin) pairs, then one weighted segment per occupied pair is rasterized,
+    # so the cost depends on the grid size rather than on the number of rows. Rows missing
+    # either value have no segment between these two axes and are left out.
+    present = ~(np.isnan(left) | np.isnan(right))
+    left, right = left[present], right[present]
+    left_bins = np.clip((left * height).astype(np.intp), 0, height - 1)
+    right_bins = np.clip((right * height).astype(np.intp), 0, height - 1)
+    pairs = np.bincount(left_bins * height + right_bins, minlength=height * height)
+    occupied = np.flatnonzero(pairs)
+    start = (occupied // height + 0.5) / height
+    end = (occupied % height + 0.5) / height
+
+    t = (np.arange(width) + 0.5) / width
+    rows = np.clip(((start[:, None] + (end - start)[:, None] * t) * height).astype(np.intp), 0, height - 1)
+    cells = rows * width + np.arange(width)
+    weights = np.repeat(pairs[occupied], width)
+    return np.bincount(cells.ravel(), weights=weights, minlength=height * width).reshape(height, width)
+
+@profiled
+def parallel_coordinates(data, columns=None, mode='auto', color_by=None, cmap='viridis', resolution=(200, 100),
+                         xlabel='Variable', ylabel='Normalized value', title='Parallel Coordinates', line_kwargs=None, ax=None):
+    """
+    Creates a parallel-coordinates chart with one vertical axis per variable and one polyline per row.
+
+    Best used for: Comparing many observations across several variables and spotting clusters or trade-offs.
+
+    Parameters:
+    - data: DataFrame-like with named columns, or a 2D array with one row per observation.
+    - columns: columns to draw, in order (labels for the axes when data is an array).
+    - mode: 'lines', 'density' (rows accumulated into a pixel grid per pair of axes), or 'auto',
+      which switches to density above 50,000 rows.
+    - color_by: column name or array used to colour lines in 'lines' mode.
+    - resolution: (height, width) in grid cells of each axis pair in 'density' mode.
+    """
+    if line_kwargs is None:
+        line_kwargs = {}
+
+    if hasattr(data, 'columns'):
+        columns = list(data.columns) if columns is None else list(columns)
+        values = np.column_stack([as_array(data[column]) for column in columns])
+        if isinstance(color_by, str):
+            color_by = data[color_by]
+    else:
+        values = as_array(data)
+        columns = list(range(values.shape[1])) if columns is None else list(columns)
+
+    with phase('prepare'):
+        low = np.nanmin(values, axis=0)
+        high = np.nanmax(values, axis=0)
+        normalized = (values - low) / np.where(high > low, high - low, 1)
+    axes_x = np.arange(len(columns))
+    if mode == 'auto':
+        mode = 'density' if len(values) > 50_000 else 'lines'
+
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    if mode == 'lines':
+        polylines = np.empty(normalized.shape + (2,))
+        polylines[..., 0] = axes_x
+        polylines[..., 1] = normalized
+        if color_by is not None:
+            line_kwargs = {'colors': continuous_colors(color_by, cmap), **line_kwargs}
+        ax.add_collection(LineCollection(polylines, **{'linewidth': 0.5, 'alpha': 0.5, **line_kwargs}))
+    elif mode == 'density':
+        height, width = resolution
+        with phase('prepare'):
+            grid = np.hstack([_pair_density(normalized[:, i], normalized[:, i + 1], height, width)
+                              for i in range(len(columns) - 1)])
+        ax.imshow(grid, origin='lower', extent=(0, len(columns) - 1, 0, 1), aspect='auto',
+                  cmap=get_cmap(cmap), norm=LogNorm(), interpolation='nearest')
+    else:
+        raise ValueError("mode must be 'lines', 'density' or 'auto'.")
+
+    ax.vlines(axes_x, 0, 1, color='black', linewidth=1)
+    for x, column_low, column_high in zip(axes_x, low, high):
+        ax.annotate(f'{column_low:.3g}', (x, 0), xytext=(0, -12), textcoords='offset points', ha='center', fontsize='x-small')
+        ax.annotate(f'{column_high:.3g}', (x, 1), xytext=(0, 4), textcoords='offset points', ha='center', fontsize='x-small')
+    ax.set_xlim(-0.1, len(columns) - 0.9)
+    ax.set_ylim(-0.02, 1.02)
+    ax.set_xticks(axes_x)
+    ax.set_xticklabels(columns)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
@@ -0,0 +1,184 @@
+import math
+
+import numpy as np
+
+from adapters import as_array
+from palettes import get_cmap
+
+# Above this many cells, annotations are switched off (annot=None) or limited to the
+# strongest cells (annot=True).
+MAX_ANNOTATED_CELLS = 400
+
+# Matrices larger than this along either side are block-averaged before drawing.
+MAX_DRAWN_SIDE = 1000
+
+# Maximum number of tick labels drawn along each side of the matrix.
+MAX_TICK_LABELS = 50
+
+# sns.heatmap keywords and the draw_matrix parameters they map to; any other keyword goes to imshow.
+HEATMAP_KEYWORDS = {'annot': 'annot', 'fmt': 'fmt', 'annot_kws': 'annot_kwargs', 'cbar': 'colorbar',
+                    'cbar_kws': 'colorbar_kwargs', 'linewidths': 'linewidths', 'linecolor': 'linecolor',
+                    'mask': 'mask', 'robust': 'robust', 'center': 'center', 'square': 'square'}
+
+# sns.heatmap keywords that have no equivalent here.
+UNSUPPORTED_HEATMAP_KEYWORDS = ('xticklabels', 'yticklabels', 'cbar_ax', 'ax')
+
+
+def downsample_blocks(matrix, max_rows=MAX_DRAWN_SIDE, max_cols=MAX_DRAWN_SIDE, chunk_rows=4096):
+    """
+    Averages a matrix over rectangular blocks so that it fits into max_rows x max_cols.
+
+    Rows are read chunk by chunk, so memory-mapped matrices are never loaded whole.
+    Returns the reduced matrix and the (row, col) block sizes.
+    """
+    n_rows, n_cols = matrix.shape
+    row_block = max(1, math.ceil(n_rows / max_rows))
+    col_block = max(1, math.ceil(n_cols / max_cols))
+    if row_block == 1 and col_block == 1:
+        return np.asarray(matrix, dtype=float), (1, 1)
+
+    out_rows = math.ceil(n_rows / row_block)
+    out_cols = math.ceil(n_cols / col_block)
+    reduced = np.empty((out_rows, out_cols))
+    step = max(1, chunk_rows // row_block) * row_block
+    for start in range(0, n_rows, step):
+        chunk = np.asarray(matrix[start:start + step], dtype=float)
+        pad_rows = -len(chunk) % row_block
+        pad_cols = -n_cols % col_block
+        if pad_rows or pad_cols:
+            chunk = np.pad(chunk, ((0, pad_rows), (0, pad_cols)), constant_values=np.nan)
+        blocks = chunk.reshape(len(chunk) // row_block, row_block, out_cols, col_block)
+        with np.errstate(invalid='ignore'):
+            reduced[start // row_block:start // row_block + len(blocks)] = np.nanmean(blocks, axis=(1, 3))
+    return reduced, (row_block, col_block)
+
+
+def cluster_order(matrix, method='average', metric='euclidean'):
+    """
+    Returns the leaf order of a SciPy hierarchical clustering of the matrix rows.
+    """
+    from scipy.cluster.hierarchy import leaves_list, linkage
+
+    rows = np.nan_to_num(np.asarray(matrix, dtype=float))
+    if len(rows) < 2:
+        return np.arange(len(rows))
+    return leaves_list(linkage(rows, method=method, metric=metric))
+
+
+def _tick_labels(axis_setter, label_setter, labels, n_cells, block):
+    if labels is None:
+        return
+    labels = np.asarray(labels)
+    step = max(1, math.ceil(n_cells / MAX_TICK_LABELS))
+    positions = np.arange(0, n_cells, step)
+    axis_setter(positions)
+    label_setter(labels[positions * block])
+
+
+def heatmap_options(heatmap_kwargs):
+    """
+    Splits sns.heatmap-style keyword arguments into draw_matrix parameters and imshow keywords.
+
+    Returns a dict of draw_matrix parameters whose 'image_kwargs' holds the remaining keywords.
+    Raises ValueError for sns.heatmap keywords that draw_matrix cannot honour.
+    """
+    options = {'image_kwargs': {}}
+    for key, value in (heatmap_kwargs or {}).items():
+        if key in UNSUPPORTED_HEATMAP_KEYWORDS:
+            raise ValueError(f"heatmap_kwargs does not support {key!r}; pass tick labels as x_labels and "
+                             f"y_labels, and the Axes as ax.")
+        if key in HEATMAP_KEYWORDS:
+            options[HEATMAP_KEYWORDS[key]] = value
+        else:
+            options['image_kwargs'][key] = value
+    return options
+
+
+def _color_limits(values, image_kwargs, robust, center):
+    # vmin/vmax as sns.heatmap picks them: 2nd/98th percentiles with robust, symmetric around center.
+    vmin, vmax = image_kwargs.get('vmin'), image_kwargs.get('vmax')
+    if vmin is None:
+        vmin = np.nanpercentile(values, 2) if robust else np.nanmin(values)
+    if vmax is None:
+        vmax = np.nanpercentile(values, 98) if robust else np.nanmax(values)
+    if center is not None:
+        span = max(vmax - center, center - vmin)
+        vmin, vmax = center - span, center + span
+    return vmin, vmax
+
+
+def _cell_borders(ax, shape, linewidths, linecolor):
+    rows, cols = shape
+    ax.vlines(np.arange(cols + 1) - 0.5, -0.5, rows - 0.5, colors=linecolor, linewidths=linewidths)
+    ax.hlines(np.arange(rows + 1) - 0.5, -0.5, cols - 0.5, colors=linecolor, linewidths=linewidths)
+
+
+def _annotate(ax, values, annot, fmt, max_annot_cells, annot_kwargs=None):
+    if annot is False or (annot is None and values.size > max_annot_cells):
+        return
+    # Masked and missing cells stay blank, as in sns.heatmap.
+    finite = np.isfinite(values).ravel()
+    flat = np.where(finite, np.abs(values.ravel()), -1)
+    if finite.sum() > max_annot_cells:
+        cells = np.argpartition(flat, -max_annot_cells)[-max_annot_cells:]
+    else:
+        cells = np.flatnonzero(finite)
+    rows, cols = np.unravel_index(cells, values.shape)
+    for row, col in zip(rows, cols):
+        ax.text(col, row, format(values[row, col], fmt), **{'ha': 'center', 'va': 'center', 'fontsize': 'small',
+                                                            **(annot_kwargs or {})})
+
+
+def draw_matrix(ax, data, x_labels=None, y_labels=None, cmap='viridis', annot=None, fmt='.2g',
+                reorder=None, max_annot_cells=MAX_ANNOTATED_CELLS, max_side=MAX_DRAWN_SIDE,
+                colorbar=True, image_kwargs=None, annot_kwargs=None, colorbar_kwargs=None, linewidths=0,
+                linecolor='white', mask=None, robust=False, center=None, square=False):
+    """
+    Draws a matrix as a single image, with optional clustering, block-downsampling and annotations.
+
+    Parameters:
+    - data: 2D array, including np.memmap matrices.
+    - annot: True, False, or None to annotate only matrices up to max_annot_cells cells.
+      With annot=True on larger matrices, only the max_annot_cells strongest cells are annotated.
+    - reorder: None, or 'cluster' to order rows and columns by hierarchical clustering.
+    - max_side: matrices longer than this along either side are block-averaged.
+    - annot_kwargs, colorbar_kwargs, linewidths, linecolor, mask, robust, center, square: as the
+      annot_kws, cbar_kws, ... parameters of sns.heatmap (see heatmap_options). A mask loads the
+      whole matrix, and cell borders are drawn around the downsampled cells.
+    """
+    image_kwargs = {'cmap': cmap, **(image_kwargs or {})}
+    image_kwargs['cmap'] = get_cmap(image_kwargs['cmap'])
+
+    if np.ma.isMaskedArray(data):
+        data = data.astype(float).filled(np.nan)
+    elif not isinstance(data, np.ndarray):
+        data = as_array(data)
+    if mask is not None:
+        data = np.where(np.asarray(mask, dtype=bool), np.nan, np.asarray(data, dtype=float))
+    if x_labels is not None:
+        x_labels = np.asarray(x_labels)
+    if y_labels is not None:
+        y_labels = np.asarray(y_labels)
+
+    if reorder == 'cluster':
+        row_order = cluster_order(data)
+        col_order = row_order if data.shape[0] == data.shape[1] else cluster_order(np.asarray(data).T)
+        data = np.asarray(data)[np.ix_(row_order, col_order)]
+        x_labels = None if x_labels is None else x_labels[col_order]
+        y_labels = None if y_labels is None else y_labels[row_order]
+    elif reorder is not None:
+        raise ValueError("reorder must be None or 'cluster'.")
+
+    values, (row_block, col_block) = downsample_blocks(data, max_side, max_side)
+    if (robust or center is not None) and 'norm' not in image_kwargs:
+        image_kwargs['vmin'], image_kwargs['vmax'] = _color_limits(values, image_kwargs, robust, center)
+    image_kwargs.setdefault('aspect', 'equal' if square else 'auto')
+    image = ax.imshow(values, interpolation='nearest', **image_kwargs)
+    if linewidths:
+        _cell_borders(ax, values.shape, linewidths, linecolor)
+    _tick_labels(ax.set_xticks, ax.set_xticklabels, x_labels, values.shape[1], col_block)
+    _tick_labels(ax.set_yticks, ax.set_yticklabels, y_labels, values.shape[0], row_block)
+    _annotate(ax, values, annot, fmt, max_annot_cells, annot_kwargs)
+    if colorbar:
+        ax.figure.colorbar(image, ax=ax, **(colorbar_kwargs or {}))
+    return image
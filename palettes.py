@@ -0,0 +1,76 @@
+from functools import lru_cache
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Colormap, Normalize, to_rgba
+
+from adapters import as_array
+
+
+@lru_cache(maxsize=512)
+def _parse_color(color):
+    return to_rgba(color)
+
+
+def parse_color(color):
+    """
+    Returns the RGBA tuple for a matplotlib color spec, parsing each distinct spec only once.
+    """
+    if isinstance(color, list):
+        color = tuple(color)
+    return _parse_color(color)
+
+
+@lru_cache(maxsize=64)
+def _named_cmap(name):
+    return colormaps[name]
+
+
+def get_cmap(cmap):
+    """
+    Resolves a colormap name (cached) or passes a Colormap instance through.
+    """
+    if isinstance(cmap, Colormap):
+        return cmap
+    return _named_cmap(cmap)
+
+
+def sign_colors(values, negative='red', positive='green', threshold=0):
+    """
+    Maps values to an (n, 4) RGBA array: `negative` below threshold, `positive` otherwise.
+    """
+    values = as_array(values)
+    return np.where((values < threshold)[:, None], parse_color(negative), parse_color(positive))
+
+
+def threshold_colors(values, thresholds, colors):
+    """
+    Maps values to an (n, 4) RGBA array by the interval of `thresholds` they fall into.
+
+    `colors` needs one entry more than `thresholds`: colors[0] is used below thresholds[0],
+    colors[-1] at or above thresholds[-1].
+    """
+    if len(colors) != len(thresholds) + 1:
+        raise ValueError("threshold_colors needs exactly one more color than thresholds.")
+    palette = np.array([parse_color(color) for color in colors])
+    return palette[np.digitize(as_array(values), thresholds)]
+
+
+def scalar_mappable(cmap, vmin, vmax):
+    """
+    Returns a ScalarMappable for drawing a colorbar that matches continuous_colors.
+    """
+    return ScalarMappable(norm=Normalize(vmin=vmin, vmax=vmax), cmap=get_cmap(cmap))
+
+
+def continuous_colors(values, cmap='viridis', vmin=None, vmax=None):
+    """
+    Maps values through a colormap into an (n, 4) RGBA array; NaN values get the colormap's 'bad' color.
+    """
+    values = as_array(values)
+    if vmin is None:
+        vmin = np.nanmin(values)
+    if vmax is None:
+        vmax = np.nanmax(values)
+    return get_cmap(cmap)(Normalize(vmin=vmin, vmax=vmax)(values))
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
@@ -7,7 +6,13 @@ from matplotlib_venn import venn2, venn3
 from scipy.spatial import Voronoi, voronoi_plot_2d
 import plotly.express as px
 
-def column_stacked(data, categories, labels, xlabel='Category', ylabel='Value', title='Stacked Column Chart', bar_kwargs=None):
+from adapters import as_array, as_column
+from figures import finish, new_figure
+from palettes import sign_colors
+from profiling import profiled
+
+@profiled
+def column_stacked(data, categories, labels, xlabel='Category', ylabel='Value', title='Stacked Column Chart', bar_kwargs=None, ax=None):
     """
     Creates a stacked column chart to show part-to-whole relationships.
 
@@ -16,15 +21,17 @@ def column_stacked(data, categories, labels, xlabel='Category', ylabel='Value',
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    df = pd.DataFrame(data, index=categories, columns=labels)
-    df.plot(kind='bar', stacked=True, figsize=(8, 6), **bar_kwargs)
-    plt.xlabel(xlabel)
-    plt.ylabel(ylabel)
-    plt.title(title)
-    plt.legend()
-    plt.show()
+    df = pd.DataFrame(as_array(data), index=as_column(categories), columns=labels)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    df.plot(kind='bar', stacked=True, ax=ax, **bar_kwargs)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.legend()
+    return finish(fig)
 
-def pie_chart(values, labels, title='Pie Chart', pie_kwargs=None):
+@profiled
+def pie_chart(values, labels, title='Pie Chart', pie_kwargs=None, ax=None):
     """
     Creates a pie chart to visualize proportions within a whole.
 
@@ -33,13 +40,14 @@ def pie_chart(values, labels, title='Pie Chart', pie_kwargs=None):
     if pie_kwargs is None:
         pie_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.pie(values, labels=labels, autopct='%1.1f%%', **pie_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.pie(as_array(values), labels=labels, autopct='%1.1f%%', **pie_kwargs)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def doughnut_chart(values, labels, title='Doughnut Chart', pie_kwargs=None):
+@profiled
+def doughnut_chart(values, labels, title='Doughnut Chart', pie_kwargs=None, ax=None):
     """
     Creates a doughnut chart, similar to a pie chart but with a central hole.
 
@@ -48,14 +56,16 @@ def doughnut_chart(values, labels, title='Doughnut Chart', pie_kwargs=None):
     if pie_kwargs is None:
         pie_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    wedges, _ = ax.pie(values, labels=labels, autopct='%1.1f%%', **pie_kwargs)
-    plt.setp(wedges, width=0.4)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    wedges = ax.pie(as_array(values), labels=labels, autopct='%1.1f%%', **pie_kwargs)[0]
+    for wedge in wedges:
+        wedge.set_width(0.4)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def treemap(values, labels, title='Treemap', treemap_kwargs=None):
+@profiled
+def treemap(values, labels, title='Treemap', treemap_kwargs=None, ax=None):
     """
     Creates a treemap for hierarchical part-to-whole visualization.
 
@@ -64,20 +74,21 @@ def treemap(values, labels, title='Treemap', treemap_kwargs=None):
     if treemap_kwargs is None:
         treemap_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    squarify.plot(sizes=values, label=labels, ax=ax, **treemap_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    squarify.plot(sizes=as_array(values), label=labels, ax=ax, **treemap_kwargs)
     ax.set_title(title)
-    plt.axis('off')
-    plt.show()
+    ax.set_axis_off()
+    return finish(fig)
 
 
-def venn_diagram(sets, labels, title='Venn Diagram'):
+@profiled
+def venn_diagram(sets, labels, title='Venn Diagram', ax=None):
     """
     Creates a Venn diagram to show overlaps between sets.
 
     Best used for: Illustrating relationships between two or three sets.
     """
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     if len(sets) == 2:
         venn2(sets, set_labels=labels, ax=ax)
     elif len(sets) == 3:
@@ -86,10 +97,11 @@ def venn_diagram(sets, labels, title='Venn Diagram'):
         raise ValueError("Venn diagrams only support 2 or 3 sets.")
     
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def waterfall_chart(categories, values, xlabel='Category', ylabel='Value', title='Waterfall Chart', bar_kwargs=None):
+@profiled
+def waterfall_chart(categories, values, xlabel='Category', ylabel='Value', title='Waterfall Chart', bar_kwargs=None, ax=None):
     """
     Creates a waterfall chart to display sequential changes in values, including positive and negative components.
 
@@ -98,16 +110,18 @@ def waterfall_chart(categories, values, xlabel='Category', ylabel='Value', title
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    running_total = np.cumsum([0] + values[:-1])
-    fig, ax = plt.subplots(figsize=(8, 6))
-    colors = ['green' if v >= 0 else 'red' for v in values]
-    ax.bar(categories, values, bottom=running_total, color=colors, **bar_kwargs)
+    values = as_array(values)
+    running_total = np.concatenate(([0.0], np.cumsum(values[:-1])))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    colors = sign_colors(values, negative='red', positive='green')
+    ax.bar(as_column(categories), values, bottom=running_total, color=colors, **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def voronoi_diagram(points, title="Voronoi Diagram", voronoi_kwargs=None):
+@profiled
+def voronoi_diagram(points, title="Voronoi Diagram", voronoi_kwargs=None, ax=None):
     """
     Creates a Voronoi diagram to partition space based on proximity to given points.
 
@@ -116,23 +130,26 @@ def voronoi_diagram(points, title="Voronoi Diagram", voronoi_kwargs=None):
     if voronoi_kwargs is None:
         voronoi_kwargs = {}
 
-    vor = Voronoi(points)
-    fig, ax = plt.subplots(figsize=(8, 6))
+    vor = Voronoi(as_array(points))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     voronoi_plot_2d(vor, ax=ax, **voronoi_kwargs)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
+@profiled
 def sunburst_chart(data, path, values, title="Sunburst Chart"):
     """
     Creates a sunburst chart for hierarchical part-to-whole relationships.
 
     Best used for: Hierarchical structures, organizational breakdowns.
+
+    Returns the Plotly figure rather than a Matplotlib one.
     """
-    fig = px.sunburst(data, path=path, values=values, title=title)
-    fig.show()
+    return px.sunburst(data, path=path, values=values, title=title)
 
-def arc_chart(categories, values, title="Arc Chart", arc_kwargs=None):
+@profiled
+def arc_chart(categories, values, title="Arc Chart", arc_kwargs=None, ax=None):
     """
     Creates an arc chart (hemicycle) to visualize political or proportional results.
 
@@ -141,15 +158,17 @@ def arc_chart(categories, values, title="Arc Chart", arc_kwargs=None):
     if arc_kwargs is None:
         arc_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(8, 4), subplot_kw={'projection': 'polar'})
+    values = as_array(values)
+    fig, ax = new_figure(figsize=(8, 4), subplot_kw={'projection': 'polar'}, ax=ax)
     theta = np.linspace(0, np.pi, len(values))
     ax.bar(theta, values, width=np.pi / len(values), **arc_kwargs)
     ax.set_xticks([])
     ax.set_yticks([])
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def gridplot(data, rows, cols, title="Gridplot", grid_kwargs=None):
+@profiled
+def gridplot(data, rows, cols, title="Gridplot", grid_kwargs=None, ax=None):
     """
     Creates a gridplot for representing percentage-based information using whole numbers.
 
@@ -158,9 +177,9 @@ def gridplot(data, rows, cols, title="Gridplot", grid_kwargs=None):
     if grid_kwargs is None:
         grid_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.imshow(data, cmap="gray_r", **grid_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.imshow(as_array(data), cmap="gray_r", **grid_kwargs)
     ax.set_xticks([])
     ax.set_yticks([])
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
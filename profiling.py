@@ -0,0 +1,178 @@
+import functools
+import io
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from matplotlib.figure import Figure
+
+# Phases of a profiled chart call: 'prepare' (and any other custom phase) is timed by phase()
+# blocks inside chart functions and 'artists' is the rest of the call, while 'layout' (a full
+# canvas draw) and 'encode' (saving to an in-memory file) are measured on the returned
+# figure after the call.
+_settings = {'enabled': False, 'memory': False, 'layout': True, 'encode': 'png'}
+_callbacks = []
+_local = threading.local()
+
+# Every function decorated with @profiled, by "module.function" name. This is the registry of
+# chart functions that specs (and so the chart server) can render by name.
+CHART_FUNCTIONS = {}
+
+
+def enable(memory=False, layout=True, encode='png'):
+    """
+    Turns profiling on for every chart call.
+
+    Parameters:
+    - memory: also record the tracemalloc peak of each call (slows allocations down noticeably).
+    - layout: time a full draw of every figure the call produced.
+    - encode: file format used to time encoding, or None to skip it.
+    """
+    _settings.update(enabled=True, memory=memory, layout=layout, encode=encode)
+
+
+def disable():
+    """
+    Turns profiling off; profiled functions then run with a single flag check of overhead.
+    """
+    _settings['enabled'] = False
+
+
+def is_enabled():
+    return _settings['enabled']
+
+
+def add_callback(callback):
+    """
+    Registers callback(record), called with the record dict of every profiled chart call.
+    """
+    _callbacks.append(callback)
+    return callback
+
+
+def remove_callback(callback):
+    _callbacks.remove(callback)
+
+
+@contextmanager
+def profile(memory=False, layout=True, encode='png'):
+    """
+    Profiles every chart call inside the block and yields the list their records are appended to.
+
+        with profile() as records:
+            bar_stacked_proportional(data, categories, labels)
+        write_json(records, 'profile.json')
+    """
+    records = []
+    previous = dict(_settings)
+    enable(memory=memory, layout=layout, encode=encode)
+    add_callback(records.append)
+    try:
+        yield records
+    finally:
+        remove_callback(records.append)
+        _settings.update(previous)
+
+
+@contextmanager
+def phase(name):
+    """
+    Times the enclosed block as phase `name` of the chart call currently being profiled.
+    """
+    record = getattr(_local, 'record', None)
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['phases'][name] = record['phases'].get(name, 0.0) + time.perf_counter() - start
+
+
+def _measure_figures(record, figures):
+    record['figures'] = len(figures)
+    record['artist_count'] = sum(len(fig.findobj()) for fig in figures)
+    if _settings['layout']:
+        start = time.perf_counter()
+        for fig in figures:
+            fig.canvas.draw()
+        record['phases']['layout'] = time.perf_counter() - start
+    if _settings['encode']:
+        start = time.perf_counter()
+        for fig in figures:
+            fig.savefig(io.BytesIO(), format=_settings['encode'])
+        record['phases']['encode'] = time.perf_counter() - start
+
+
+def profiled(func):
+    """
+    Decorator that records a profile for each call of a chart function while profiling is enabled.
+
+    Records hold the chart name, per-phase timings in seconds, the total time, the number of
+    figures and artists produced and, with memory=True, the peak traced memory in bytes.
+    Nested chart calls are folded into the outermost one.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _settings['enabled'] or getattr(_local, 'record', None) is not None:
+            return func(*args, **kwargs)
+
+        record = {'chart': name, 'thread': threading.current_thread().name, 'phases': {}}
+        trace_memory = _settings['memory']
+        if trace_memory:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        _local.record = record
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _local.record = None
+            if trace_memory:
+                record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+        record['phases']['artists'] = max(elapsed - sum(record['phases'].values()), 0.0)
+
+        _measure_figures(record, [result] if isinstance(result, Figure) else [])
+        record['total'] = sum(record['phases'].values())
+        for callback in list(_callbacks):
+            callback(record)
+        return result
+
+    CHART_FUNCTIONS[name] = wrapper
+    return wrapper
+
+
+def write_json(records, path=None, indent=2):
+    """
+    Serializes profile records to JSON, writing them to `path` when given; returns the JSON text.
+    """
+    text = json.dumps(records, indent=indent)
+    if path is not None:
+        with open(path, 'w') as file:
+            file.write(text)
+    return text
+
+
+def json_lines_callback(stream):
+    """
+    Returns a callback that appends each record to an open text stream as one JSON line.
+    """
+    lock = threading.Lock()
+
+    def write(record):
+        with lock:
+            stream.write(json.dumps(record) + '\n')
+            stream.flush()
+
+    return write
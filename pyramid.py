@@ -0,0 +1,151 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from adapters import as_array
+
+
+class SeriesPyramid:
+    """
+    Multi-resolution min/max/sum index over an append-only series, stored as memory-mapped files.
+
+    The samples and every level live as raw float64 files in one directory. Level k holds one
+    (min, max, sum) row per complete block of 2**k samples, from min_level up to the coarsest
+    block that fits the series, so the index takes about 3 / 2**(min_level - 1) times the space
+    of the samples. Appends only reduce the new samples, and a window query reads roughly
+    `pixels` rows from the level whose block matches the requested resolution.
+
+    Parameters:
+    - directory: where the samples, levels and metadata are kept; an existing pyramid is reopened.
+    - min_level: finest level (blocks of 2**min_level samples); finer queries read raw samples.
+    - start, step: x value of the first sample and the spacing between samples.
+    """
+
+    def __init__(self, directory, min_level=4, start=0.0, step=1.0):
+        self.directory = directory
+        self._meta_path = os.path.join(directory, 'pyramid.json')
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as file:
+                meta = json.load(file)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            meta = {'min_level': min_level, 'start': start, 'step': step, 'length': 0, 'rows': {}}
+        self.min_level = meta['min_level']
+        self.start = meta['start']
+        self.step = meta['step']
+        self.length = meta['length']
+        self.rows = {int(level): count for level, count in meta['rows'].items()}
+
+    @classmethod
+    def build(cls, directory, values, chunk_size=1 << 22, **kwargs):
+        """
+        Creates (or extends) a pyramid from an array, np.memmap included, reading it chunk by chunk.
+        """
+        pyramid = cls(directory, **kwargs)
+        for offset in range(0, len(values), chunk_size):
+            pyramid.append(values[offset:offset + chunk_size])
+        return pyramid
+
+    def __len__(self):
+        return self.length
+
+    def _file(self, name):
+        return os.path.join(self.directory, f'{name}.f8')
+
+    def _map(self, name, rows, columns=None):
+        if rows == 0:
+            return np.empty((0,) if columns is None else (0, columns))
+        shape = (rows,) if columns is None else (rows, columns)
+        return np.memmap(self._file(name), dtype=np.float64, mode='r', shape=shape)
+
+    def _extend(self, name, array):
+        with open(self._file(name), 'ab') as file:
+            file.write(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+
+    def samples(self):
+        return self._map('samples', self.length)
+
+    def level(self, level):
+        """
+        Returns the (rows, 3) memory-mapped (min, max, sum) table of a level.
+        """
+        return self._map(f'level_{level}', self.rows.get(level, 0), 3)
+
+    def append(self, values):
+        """
+        Appends samples and updates every level with the blocks they complete.
+        """
+        values = as_array(values).ravel()
+        if not len(values):
+            return
+        self._extend('samples', values)
+        self.length += len(values)
+
+        # The finest level reduces raw samples; every coarser level merges pairs of rows below it.
+        block = 1 << self.min_level
+        done = self.rows.get(self.min_level, 0)
+        complete = self.length // block
+        if complete > done:
+            blocks = np.asarray(self.samples()[done * block:complete * block]).reshape(-1, block)
+            self._extend(f'level_{self.min_level}', np.column_stack(
+                (np.fmin.reduce(blocks, axis=1), np.fmax.reduce(blocks, axis=1), np.nansum(blocks, axis=1))))
+            self.rows[self.min_level] = complete
+
+        level = self.min_level
+        while self.rows.get(level, 0) >= 2:
+            done = self.rows.get(level + 1, 0)
+            complete = self.rows[level] // 2
+            if complete > done:
+                pairs = np.asarray(self.level(level)[2 * done:2 * complete]).reshape(-1, 2, 3)
+                self._extend(f'level_{level + 1}', np.column_stack(
+                    (np.fmin.reduce(pairs[:, :, 0], axis=1), np.fmax.reduce(pairs[:, :, 1], axis=1),
+                     pairs[:, :, 2].sum(axis=1))))
+                self.rows[level + 1] = complete
+            level += 1
+
+        with open(self._meta_path, 'w') as file:
+            json.dump({'min_level': self.min_level, 'start': self.start, 'step': self.step,
+                       'length': self.length, 'rows': self.rows}, file)
+
+    def window(self, start=None, stop=None, pixels=1000):
+        """
+        Summarises the samples between x values start and stop into about `pixels` buckets.
+
+        Returns (x, mins, maxs, means), where x is the x value at which each bucket starts.
+        Buckets follow the block grid of the chosen level, so the first one may begin slightly
+        before `start`. No bucket runs past `stop`: the end of the window that does not fill a
+        whole block (like the not yet complete end of the series) is filled in from finer levels
+        and, last, from raw samples.
+        """
+        # The small tolerance keeps x values that fall exactly on a sample from rounding to its neighbour.
+        first = 0 if start is None else max(math.floor((start - self.start) / self.step + 1e-9), 0)
+        stop_index = self.length if stop is None else min(math.ceil((stop - self.start) / self.step - 1e-9), self.length)
+        if stop_index <= first:
+            empty = np.empty(0)
+            return empty, empty, empty, empty
+
+        per_bucket = (stop_index - first) / max(pixels, 1)
+        level = min(int(math.log2(per_bucket)) if per_bucket >= 1 else 0, max(self.rows, default=0))
+        positions, pieces = [], []
+        position = first
+        while level >= self.min_level and position < stop_index:
+            block = 1 << level
+            table = self.level(level)
+            row_start = position // block
+            row_stop = min(stop_index // block, len(table))
+            if row_stop > row_start:
+                rows = np.asarray(table[row_start:row_stop])
+                positions.append(np.arange(row_start, row_stop) * block)
+                pieces.append(np.column_stack((rows[:, 0], rows[:, 1], rows[:, 2] / block)))
+                position = row_stop * block
+            level -= 1
+        if position < stop_index:
+            raw = np.asarray(self.samples()[position:stop_index])
+            positions.append(np.arange(position, stop_index))
+            pieces.append(np.column_stack((raw, raw, raw)))
+
+        buckets = np.concatenate(pieces)
+        x = self.start + np.concatenate(positions) * self.step
+        return x, buckets[:, 0], buckets[:, 1], buckets[:, 2]
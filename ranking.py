@@ -1,90 +1,236 @@
-import matplotlib.pyplot as plt
+import heapq
+
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.collections import LineCollection
+
+from adapters import as_array, as_column
+from artists import slope_collection
+from figures import finish, new_figure
+from palettes import get_cmap
+from profiling import phase, profiled
+
+def _select_ranked(values, top_k, bottom=False):
+    # Indices of the top (or bottom) k values in rank order: argpartition keeps this
+    # O(n + k log k) instead of sorting every value.
+    keys = values if bottom else -values
+    if top_k < len(values):
+        candidates = np.argpartition(keys, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(keys[candidates], kind='stable')]
+
+def top_k_from_chunks(chunks, top_k, bottom=False):
+    """
+    Selects the top_k largest (or smallest) items from an iterable of (categories, values) chunks.
+
+    Only top_k candidates are kept between chunks, in a heap.
+    Returns (categories, values, rest_total, rest_count): the selected items in rank order,
+    plus the sum and number of all other items. Missing (NaN) values are neither ranked nor counted.
+    """
+    heap = []
+    sign = -1 if bottom else 1
+    total, count, seen = 0.0, 0, 0
+    for categories, values in chunks:
+        values = as_array(values)
+        categories = as_column(categories)
+        total += np.nansum(values)
+        count += np.count_nonzero(~np.isnan(values))
+        for index in _select_ranked(values, top_k, bottom):
+            if np.isnan(values[index]):
+                continue
+            # The running counter breaks ties so categories themselves are never compared.
+            item = (sign * values[index], seen, categories[index], values[index])
+            seen += 1
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+
+    best = sorted(heap, key=lambda item: (-item[0], item[1]))
+    selected_categories = np.array([item[2] for item in best])
+    selected_values = np.array([item[3] for item in best], dtype=float)
+    return selected_categories, selected_values, total - selected_values.sum(), count - len(best)
 
-def bar_ordered(categories, values, xlabel='Value', ylabel='Category', title='Ordered Bar Chart', bar_kwargs=None):
+def _ranked_items(categories, values, top_k=None, bottom=False, rest_label='Rest', chunks=None):
+    if chunks is not None:
+        if top_k is None:
+            raise ValueError("Ranking chunked input requires top_k.")
+        ranked_categories, ranked_values, rest_total, rest_count = top_k_from_chunks(chunks, top_k, bottom)
+    else:
+        values = as_array(values)
+        categories = as_column(categories)
+        if top_k is None:
+            sorted_indices = np.argsort(values)[::-1]
+            return categories[sorted_indices], values[sorted_indices]
+        present = ~np.isnan(values)
+        if not present.all():
+            categories, values = categories[present], values[present]
+        selected = _select_ranked(values, top_k, bottom)
+        ranked_categories, ranked_values = categories[selected], values[selected]
+        rest_count = len(values) - len(selected)
+        rest_total = np.nansum(values) - np.nansum(ranked_values)
+
+    # The rest bar shows the mean of the other items, which stays on the scale of the ranked ones
+    # where their sum would dwarf them.
+    if rest_label is not None and rest_count > 0:
+        ranked_categories = np.append(ranked_categories.astype(str), f'{rest_label} ({rest_count}, mean)')
+        ranked_values = np.append(ranked_values, rest_total / rest_count)
+    return ranked_categories, ranked_values
+
+@profiled
+def bar_ordered(categories, values, xlabel='Value', ylabel='Category', title='Ordered Bar Chart', bar_kwargs=None,
+                top_k=None, bottom=False, rest_label='Rest', chunks=None, ax=None):
     """
     Creates an ordered bar chart to emphasize ranking.
     
     Best used for: Comparing ranked values, league tables, constituency election results.
+
+    Parameters:
+    - top_k: draw only the k highest values (lowest with bottom=True), selected in O(n).
+    - rest_label: label of the extra bar showing the mean and count of the values outside the top k (None to omit it).
+    - chunks: iterable of (categories, values) pairs to rank instead of categories/values; requires top_k.
     """
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    sorted_indices = np.argsort(values)[::-1]
-    sorted_categories = np.array(categories)[sorted_indices]
-    sorted_values = np.array(values)[sorted_indices]
+    sorted_categories, sorted_values = _ranked_items(categories, values, top_k, bottom, rest_label, chunks)
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.barh(sorted_categories, sorted_values, **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def column_ordered(categories, values, xlabel='Category', ylabel='Value', title='Ordered Column Chart', bar_kwargs=None):
+@profiled
+def column_ordered(categories, values, xlabel='Category', ylabel='Value', title='Ordered Column Chart', bar_kwargs=None,
+                   top_k=None, bottom=False, rest_label='Rest', chunks=None, ax=None):
     """
     Creates an ordered column chart to emphasize ranking.
     
     Best used for: Highlighting rankings when absolute values matter less.
+
+    Parameters:
+    - top_k: draw only the k highest values (lowest with bottom=True), selected in O(n).
+    - rest_label: label of the extra bar showing the mean and count of the values outside the top k (None to omit it).
+    - chunks: iterable of (categories, values) pairs to rank instead of categories/values; requires top_k.
     """
     if bar_kwargs is None:
         bar_kwargs = {}
     
-    sorted_indices = np.argsort(values)[::-1]
-    sorted_categories = np.array(categories)[sorted_indices]
-    sorted_values = np.array(values)[sorted_indices]
+    sorted_categories, sorted_values = _ranked_items(categories, values, top_k, bottom, rest_label, chunks)
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.bar(sorted_categories, sorted_values, **bar_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def slope_chart(categories, values1, values2, xlabel='Category', ylabel='Value', title='Slope Chart', line_kwargs=None):
+@profiled
+def slope_chart(categories, values1, values2, xlabel='Category', ylabel='Value', title='Slope Chart', line_kwargs=None,
+                highlight=None, ax=None):
     """
     Creates a slope chart to show ranking changes between two time points.
     
     Best used for: Showing how rankings have changed over time or between categories.
+
+    Parameters:
+    - highlight: number of top movers to colour and label; the other categories are drawn muted.
+      Without it every category is coloured, and labelled when there are few enough to read.
     """
-    if line_kwargs is None:
-        line_kwargs = {}
-    
-    fig, ax = plt.subplots(figsize=(8, 6))
-    for i in range(len(categories)):
-        ax.plot([0, 1], [values1[i], values2[i]], marker='o', label=categories[i], **line_kwargs)
+    values = np.column_stack((as_array(values1), as_array(values2)))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    slope_collection(ax, [0, 1], values, labels=as_column(categories), highlight=highlight, line_kwargs=line_kwargs)
+    ax.set_xlim(-0.1, 1.3)
     ax.set_xticks([0, 1])
     ax.set_xticklabels(['Start', 'End'])
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    ax.legend()
-    plt.show()
+    return finish(fig)
 
-def lollipop_h(categories, values, xlabel='Value', ylabel='Category', title='Horizontal Lollipop Chart', lollipop_kwargs=None):
+@profiled
+def bump_chart(periods, entities, values, method='dense', top_n=None, xlabel='Period', ylabel='Rank', title='Bump Chart',
+               cmap='tab20', line_kwargs=None, ax=None):
+    """
+    Creates a bump chart tracing how each entity's rank changes across many periods.
+
+    Best used for: Showing changing league positions or market leaders over time.
+
+    Parameters:
+    - periods, entities, values: long-format columns with one row per (period, entity); the highest value ranks 1.
+    - method: 'dense' or 'min' (competition ranking, 1-2-2-4) for ties within a period.
+    - top_n: keep only ranks up to top_n in each period; trajectories break where an entity drops out.
+    """
+    if line_kwargs is None:
+        line_kwargs = {}
+    if method not in ('dense', 'min'):
+        raise ValueError("method must be 'dense' or 'min'.")
+
+    with phase('prepare'):
+        df = pd.DataFrame({'period': as_column(periods), 'entity': as_column(entities), 'value': as_array(values)})
+        df['rank'] = df.groupby('period', sort=False)['value'].rank(method=method, ascending=False)
+        if top_n is not None:
+            df = df[df['rank'] <= top_n]
+
+        # One row of ranks per entity, NaN where it is absent, so every trajectory is one polyline.
+        period_codes, period_labels = pd.factorize(df['period'], sort=True)
+        entity_codes, entity_labels = pd.factorize(df['entity'])
+        trajectories = np.full((len(entity_labels), len(period_labels), 2), np.nan)
+        trajectories[:, :, 0] = np.arange(len(period_labels))
+        trajectories[entity_codes, period_codes, 1] = df['rank'].to_numpy()
+
+    colors = get_cmap(cmap)(np.arange(len(entity_labels)) % get_cmap(cmap).N)
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    ax.add_collection(LineCollection(trajectories, colors=colors, **line_kwargs))
+    ax.autoscale_view()
+    ax.invert_yaxis()
+
+    if top_n is not None:
+        last = trajectories[:, -1, 1]
+        for entity in np.flatnonzero(~np.isnan(last)):
+            ax.annotate(str(entity_labels[entity]), (len(period_labels) - 1, last[entity]), xytext=(4, 0),
+                        textcoords='offset points', va='center', fontsize='small', color=colors[entity])
+
+    step = max(1, len(period_labels) // 20)
+    ax.set_xticks(np.arange(0, len(period_labels), step))
+    ax.set_xticklabels(np.asarray(period_labels)[::step])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    return finish(fig)
+
+@profiled
+def lollipop_h(categories, values, xlabel='Value', ylabel='Category', title='Horizontal Lollipop Chart', lollipop_kwargs=None,
+               top_k=None, bottom=False, rest_label='Rest', chunks=None, ax=None):
     """
     Creates a horizontal lollipop chart for ranking visualization.
     
     Best used for: Emphasizing specific values in a ranked dataset while maintaining order.
+
+    Parameters:
+    - top_k: draw only the k highest values (lowest with bottom=True), selected in O(n).
+    - rest_label: label of the extra bar showing the mean and count of the values outside the top k (None to omit it).
+    - chunks: iterable of (categories, values) pairs to rank instead of categories/values; requires top_k.
     """
     if lollipop_kwargs is None:
         lollipop_kwargs = {}
     
-    sorted_indices = np.argsort(values)[::-1]
-    sorted_categories = np.array(categories)[sorted_indices]
-    sorted_values = np.array(values)[sorted_indices]
+    sorted_categories, sorted_values = _ranked_items(categories, values, top_k, bottom, rest_label, chunks)
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.hlines(sorted_categories, 0, sorted_values, **lollipop_kwargs)
     ax.scatter(sorted_values, sorted_categories, color='red', zorder=3)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def lollipop_v(categories, values, xlabel='Category', ylabel='Value', title='Vertical Lollipop Chart', lollipop_kwargs=None):
+@profiled
+def lollipop_v(categories, values, xlabel='Category', ylabel='Value', title='Vertical Lollipop Chart', lollipop_kwargs=None, ax=None):
     """
     Creates a vertical lollipop chart for ranking visualization.
     
@@ -93,35 +239,40 @@ def lollipop_v(categories, values, xlabel='Category', ylabel='Value', title='Ver
     if lollipop_kwargs is None:
         lollipop_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    categories = as_column(categories)
+    values = as_array(values)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
     ax.vlines(categories, 0, values, **lollipop_kwargs)
     ax.scatter(categories, values, color='red', zorder=3)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def symbol_proportional_ordered(categories, values, xlabel='Category', ylabel='Value', title='Proportional Symbol Chart', scatter_kwargs=None):
+@profiled
+def symbol_proportional_ordered(categories, values, xlabel='Category', ylabel='Value', title='Proportional Symbol Chart', scatter_kwargs=None, ax=None):
 
     if scatter_kwargs is None:
         scatter_kwargs = {}
 
-    sizes = np.array(values) * 10  # Scale values for visualization
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.scatter(categories, values, s=sizes, **scatter_kwargs)
+    values = as_array(values)
+    sizes = values * 10  # Scale values for visualization
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    ax.scatter(as_column(categories), values, s=sizes, **scatter_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def dot_plot_strip(categories, values, xlabel='Category', ylabel='Value', title='Dot Strip Plot', strip_kwargs=None):
+@profiled
+def dot_plot_strip(categories, values, xlabel='Category', ylabel='Value', title='Dot Strip Plot', strip_kwargs=None, ax=None):
 
     if strip_kwargs is None:
         strip_kwargs = {}
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.stripplot(x=categories, y=values, ax=ax, **strip_kwargs)
+    fig, ax = new_figure(figsize=(8, 6), ax=ax)
+    sns.stripplot(x=as_column(categories), y=as_array(values), ax=ax, **strip_kwargs)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.set_title(title)
-    plt.show()
\ No newline at end of file
+    return finish(fig)
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import collections
+import importlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from specs import CHART_MODULES, DataStore, render_spec, resolve_chart
+
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml', 'pdf': 'application/pdf', 'jpg': 'image/jpeg'}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+
+
+class ServerBusy(Exception):
+    """
+    Raised when a render is refused because max_pending renders are already queued or running.
+    """
+
+
+def _warm_worker():
+    # Runs once in every worker process: imports all chart modules and renders a throwaway chart
+    # so that imports, font caches and the Agg backend are ready before the first request.
+    for module_name in CHART_MODULES:
+        importlib.import_module(module_name)
+    render_spec({'chart': 'magnitude.column_chart', 'kwargs': {'categories': ['a', 'b'], 'values': [1, 2]}})
+
+
+def spec_key(spec):
+    """
+    Canonical JSON text of a spec; identical requests share one render.
+    """
+    return json.dumps(spec, sort_keys=True, separators=(',', ':'))
+
+
+class ChartServer:
+    """
+    Asyncio front end that renders chart specs in a pool of pre-warmed worker processes.
+
+    Specs follow specs.render_spec. Only registered chart functions can be named (see
+    specs.resolve_chart), and a spec may only bring its own "data" section when the server has
+    a data_root, inside which every referenced file must lie.
+
+    Concurrent requests for an identical spec are coalesced into a single render, and once
+    max_pending distinct renders are queued or running new ones are refused with ServerBusy
+    (HTTP 503), so callers back off instead of growing an unbounded queue.
+
+    Parameters:
+    - workers: number of render processes.
+    - max_pending: distinct renders allowed in flight before requests are refused.
+    - latency_window: number of recent requests kept for the latency percentiles.
+    - data_root: directory that spec data files are read from; None refuses specs with data.
+    """
+
+    def __init__(self, workers=2, max_pending=64, latency_window=1000, data_root=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.data_root = data_root
+        self._pool = None
+        self._server = None
+        self._pending = {}
+        self._connections = set()
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._counts = collections.Counter()
+
+    async def start_workers(self):
+        """
+        Starts the worker processes and waits until every one of them has warmed up.
+        """
+        loop = asyncio.get_running_loop()
+        # The front end validates chart names, so it imports the chart modules as well.
+        for module_name in CHART_MODULES:
+            importlib.import_module(module_name)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # One trivial task per worker forces every process to start and run its initializer now.
+        await asyncio.gather(*[loop.run_in_executor(self._pool, time.sleep, 0.1) for _ in range(self.workers)])
+
+    async def render(self, spec):
+        """
+        Renders a spec and returns the encoded bytes, sharing the render with identical concurrent requests.
+        """
+        start = time.perf_counter()
+        resolve_chart(spec['chart'])
+        if spec.get('data'):
+            if self.data_root is None:
+                raise ValueError("This server does not read data files; start it with a data root to allow them.")
+            DataStore(spec['data'], self.data_root, confine=True)
+        key = spec_key(spec)
+        future = self._pending.get(key)
+        if future is not None:
+            self._counts['coalesced'] += 1
+        else:
+            if len(self._pending) >= self.max_pending:
+                self._counts['rejected'] += 1
+                raise ServerBusy(f'{len(self._pending)} renders pending.')
+            future = asyncio.get_running_loop().run_in_executor(self._pool, render_spec, spec, None, self.data_root)
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        try:
+            result = await asyncio.shield(future)
+        except Exception:
+            self._counts['failed'] += 1
+            raise
+        self._counts['served'] += 1
+        self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def stats(self):
+        """
+        Returns queue depth, request counters and latency percentiles (in seconds) as a dict.
+        """
+        pending = len(self._pending)
+        latencies = np.asarray(self._latencies)
+        percentiles = np.percentile(latencies, [50, 90, 99]) if len(latencies) else [None] * 3
+        return {
+            'pending': pending,
+            'queue_depth': max(pending - self.workers, 0),
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            **{name: self._counts[name] for name in ('served', 'coalesced', 'rejected', 'failed')},
+            'latency': {'p50': percentiles[0], 'p90': percentiles[1], 'p99': percentiles[2],
+                        'count': len(latencies)},
+        }
+
+    async def _respond(self, writer, status, body, content_type='application/json', headers=()):
+        head = [f'HTTP/1.1 {status} {REASONS[status]}', f'Content-Type: {content_type}',
+                f'Content-Length: {len(body)}', *headers]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        # Minimal HTTP/1.1: POST /render with a JSON spec returns the image, GET /stats returns
+        # stats() as JSON. Connections are kept alive until the client closes them.
+        self._connections.add(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                await self._route(writer, method, path, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # close() cancels idle keep-alive connections; ending the handler quietly is the shutdown path.
+            pass
+        finally:
+            self._connections.discard(asyncio.current_task())
+            writer.close()
+
+    async def _route(self, writer, method, path, body):
+        if path == '/stats':
+            await self._respond(writer, 200, json.dumps(self.stats()).encode())
+        elif path != '/render':
+            await self._respond(writer, 404, b'{"error": "not found"}')
+        elif method != 'POST':
+            await self._respond(writer, 405, b'{"error": "use POST"}')
+        else:
+            try:
+                spec = json.loads(body)
+                image = await self.render(spec)
+            except ServerBusy as error:
+                await self._respond(writer, 503, json.dumps({'error': str(error)}).encode(), headers=('Retry-After: 1',))
+            except (ValueError, KeyError, TypeError) as error:
+                await self._respond(writer, 400, json.dumps({'error': str(error)}).encode())
+            except Exception as error:
+                await self._respond(writer, 500, json.dumps({'error': repr(error)}).encode())
+            else:
+                await self._respond(writer, 200, image, CONTENT_TYPES.get(spec.get('format', 'png'), 'application/octet-stream'))
+
+    async def start(self, host='127.0.0.1', port=8050):
+        """
+        Warms the workers and starts listening; returns the asyncio server.
+        """
+        await self.start_workers()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for connection in list(self._connections):
+                connection.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+async def serve(host='127.0.0.1', port=8050, workers=2, max_pending=64, data_root=None):
+    """
+    Runs a ChartServer until cancelled.
+    """
+    server = ChartServer(workers=workers, max_pending=max_pending, data_root=data_root)
+    listener = await server.start(host, port)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render JSON chart specs over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-pending', type=int, default=64)
+    parser.add_argument('--data-root', default=None, help='directory that spec data files may be read from')
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers, args.max_pending, args.data_root))
+
+
+if __name__ == '__main__':
+    main()
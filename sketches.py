@@ -0,0 +1,101 @@
+import numpy as np
+
+from adapters import as_array
+
+
+class _LogBuckets:
+    # Counts per timestep over a contiguous range of integer bucket keys, widened as new keys appear.
+
+    def __init__(self, n_steps):
+        self.counts = np.zeros((n_steps, 0))
+        self.low = 0
+
+    def add(self, keys, steps):
+        if not len(keys):
+            return
+        end = self.low + self.counts.shape[1]
+        if not self.counts.shape[1]:
+            self.low = end = int(keys.min())
+        low, high = min(self.low, int(keys.min())), max(end, int(keys.max()) + 1)
+        if low < self.low or high > end:
+            self.counts = np.pad(self.counts, ((0, 0), (self.low - low, high - end)))
+            self.low = low
+        width = self.counts.shape[1]
+        cells = steps * width + (keys - self.low)
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def keys(self):
+        return np.arange(self.low, self.low + self.counts.shape[1])
+
+
+class PathQuantiles:
+    """
+    Streaming per-timestep quantile sketch for simulated paths (a DDSketch per timestep).
+
+    Values are counted in logarithmic buckets (separately for negative and positive values).
+    The q quantile of a timestep is its sample v of rank floor(q * (n - 1)), and it is returned
+    within relative_accuracy * |v| of v, however heavy the tails of the paths are; samples
+    closer to zero than min_value all count as 0, so such quantiles are off by less than
+    min_value. Memory per timestep grows only with the logarithm of the value
+    range: about log(max|v| / min|v|) / (2 * relative_accuracy) buckets per sign. Paths are
+    added in chunks of shape (n_paths, n_steps).
+    """
+
+    def __init__(self, relative_accuracy=0.005, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.positive = None
+        self.negative = None
+        self.zeros = None
+        self.total = 0
+        self.sums = None
+
+    def _keys(self, magnitudes):
+        # Bucket k holds magnitudes in (gamma**(k - 1), gamma**k].
+        return np.ceil(np.log(magnitudes) / np.log(self.gamma)).astype(np.intp)
+
+    def add(self, paths):
+        """
+        Adds a chunk of paths, one row per path and one column per timestep.
+        """
+        paths = np.atleast_2d(as_array(paths))
+        if self.positive is None:
+            self.positive = _LogBuckets(paths.shape[1])
+            self.negative = _LogBuckets(paths.shape[1])
+            self.zeros = np.zeros(paths.shape[1])
+            self.sums = np.zeros(paths.shape[1])
+
+        steps = np.broadcast_to(np.arange(paths.shape[1]), paths.shape)
+        large = np.abs(paths) >= self.min_value
+        for buckets, side in ((self.positive, large & (paths > 0)), (self.negative, large & (paths < 0))):
+            buckets.add(self._keys(np.abs(paths[side])), steps[side])
+        small = ~np.isnan(paths) & ~large
+        self.zeros += small.sum(axis=0)
+        self.sums += np.nansum(paths, axis=0)
+        self.total += len(paths)
+
+    def mean(self):
+        """
+        Returns the mean path.
+        """
+        return self.sums / self.total
+
+    def quantiles(self, q):
+        """
+        Returns an array of shape (len(q), n_steps) with the requested quantiles (0-1) per timestep.
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        # Buckets in value order: negatives from the largest magnitude down, zero, then positives.
+        gamma = self.gamma
+        values = np.concatenate((-2 * gamma ** self.negative.keys()[::-1] / (gamma + 1), [0.0],
+                                 2 * gamma ** self.positive.keys() / (gamma + 1)))
+        counts = np.column_stack((self.negative.counts[:, ::-1], self.zeros, self.positive.counts))
+        cumulative = np.cumsum(counts, axis=1)
+        row_totals = cumulative[:, -1]
+        result = np.empty((len(q), len(counts)))
+        for i, quantile in enumerate(q):
+            rank = quantile * np.maximum(row_totals - 1, 0)
+            cell = np.minimum((cumulative <= rank[:, None]).sum(axis=1), len(values) - 1)
+            result[i] = np.where(row_totals > 0, values[cell], np.nan)
+        return result
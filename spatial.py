@@ -1,11 +1,18 @@
 import geopandas as gpd
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 
-def basic_choropleth(geo_data, data, column, cmap='Blues', title='Choropleth Map', map_kwargs=None):
+from adapters import as_array
+from clustering import draw_proportional_symbols
+from figures import finish, new_figure
+from palettes import continuous_colors, get_cmap, scalar_mappable
+from profiling import profiled
+from tiles import build_tiles, update_tiles
+
+@profiled
+def basic_choropleth(geo_data, data, column, cmap='Blues', title='Choropleth Map', map_kwargs=None, ax=None):
     """
     Creates a choropleth map to represent spatial data using a color scale.
     
@@ -14,29 +21,40 @@ def basic_choropleth(geo_data, data, column, cmap='Blues', title='Choropleth Map
     if map_kwargs is None:
         map_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    geo_data.plot(column=column, cmap=cmap, legend=True, ax=ax, **map_kwargs)
+    values = as_array(geo_data[column])
+    vmin, vmax = np.nanmin(values), np.nanmax(values)
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    geo_data.plot(color=continuous_colors(values, cmap, vmin, vmax), ax=ax, **map_kwargs)
+    fig.colorbar(scalar_mappable(cmap, vmin, vmax), ax=ax)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def proportional_symbol_map(geo_data, data, column, size_factor=100, title='Proportional Symbol Map', map_kwargs=None):
+@profiled
+def proportional_symbol_map(geo_data, data, column, size_factor=100, title='Proportional Symbol Map', map_kwargs=None, ax=None, cluster='auto'):
     """
     Creates a proportional symbol map where symbol size represents total values.
     
     Best used for: Displaying total values rather than rates.
+
+    Parameters:
+    - size_factor: marker area in points^2 per unit of `column`.
+    - cluster: merge overlapping symbols into summed ones (see clustering.cluster_symbols);
+      'auto' does so above clustering.CLUSTER_THRESHOLD rows.
     """
     if map_kwargs is None:
         map_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
     geo_data.plot(ax=ax, color='lightgrey', edgecolor='black', **map_kwargs)
-    ax.scatter(data['longitude'], data['latitude'], s=data[column] * size_factor, alpha=0.5, color='red')
+    draw_proportional_symbols(ax, as_array(data['longitude']), as_array(data['latitude']), as_array(data[column]),
+                              size_factor, cluster=cluster, alpha=0.5, color='red')
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def flow_map(geo_data, flows, title='Flow Map', map_kwargs=None):
+@profiled
+def flow_map(geo_data, flows, title='Flow Map', map_kwargs=None, ax=None):
     """
     Creates a flow map showing movement between locations.
     
@@ -45,16 +63,18 @@ def flow_map(geo_data, flows, title='Flow Map', map_kwargs=None):
     if map_kwargs is None:
         map_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
     geo_data.plot(ax=ax, color='lightgrey', edgecolor='black', **map_kwargs)
-    for _, row in flows.iterrows():
-        ax.arrow(row['start_lon'], row['start_lat'], row['end_lon'] - row['start_lon'], row['end_lat'] - row['start_lat'],
-                 head_width=0.2, alpha=0.6, color='blue', length_includes_head=True)
+    start_lon = as_array(flows['start_lon'])
+    start_lat = as_array(flows['start_lat'])
+    ax.quiver(start_lon, start_lat, as_array(flows['end_lon']) - start_lon, as_array(flows['end_lat']) - start_lat,
+              angles='xy', scale_units='xy', scale=1, alpha=0.6, color='blue')
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def contour_map(geo_data, data, column, cmap='coolwarm', title='Contour Map', map_kwargs=None):
+@profiled
+def contour_map(geo_data, data, column, cmap='coolwarm', title='Contour Map', map_kwargs=None, ax=None):
     """
     Creates a contour map to represent areas of equal value.
     
@@ -63,15 +83,16 @@ def contour_map(geo_data, data, column, cmap='coolwarm', title='Contour Map', ma
     if map_kwargs is None:
         map_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
     geo_data.plot(ax=ax, color='lightgrey', edgecolor='black', **map_kwargs)
-    contour = ax.tricontourf(data['longitude'], data['latitude'], data[column], cmap=cmap)
-    plt.colorbar(contour, ax=ax)
+    contour = ax.tricontourf(as_array(data['longitude']), as_array(data['latitude']), as_array(data[column]), cmap=get_cmap(cmap))
+    fig.colorbar(contour, ax=ax)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def heat_map(data, title='Heat Map', cmap='Reds', bins=50, heatmap_kwargs=None):
+@profiled
+def heat_map(data, title='Heat Map', cmap='Reds', bins=50, heatmap_kwargs=None, ax=None):
     """
     Creates a heat map to visualize density patterns.
     
@@ -80,13 +101,14 @@ def heat_map(data, title='Heat Map', cmap='Reds', bins=50, heatmap_kwargs=None):
     if heatmap_kwargs is None:
         heatmap_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    counts, xedges, yedges = np.histogram2d(data['longitude'], data['latitude'], bins=bins)
-    ax.imshow(counts.T, origin='lower', cmap=cmap, aspect='auto', **heatmap_kwargs)
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    counts, xedges, yedges = np.histogram2d(as_array(data['longitude']), as_array(data['latitude']), bins=bins)
+    ax.imshow(counts.T, origin='lower', cmap=get_cmap(cmap), aspect='auto', **heatmap_kwargs)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
-def equalised_cartogram(geo_data, title='Equalised Cartogram', cartogram_kwargs=None):
+@profiled
+def equalised_cartogram(geo_data, title='Equalised Cartogram', cartogram_kwargs=None, ax=None):
     """
     Creates an equalised cartogram where map units are converted to equally-sized shapes.
     
@@ -95,13 +117,14 @@ def equalised_cartogram(geo_data, title='Equalised Cartogram', cartogram_kwargs=
     if cartogram_kwargs is None:
         cartogram_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
     geo_data.plot(ax=ax, **cartogram_kwargs)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def scaled_cartogram(geo_data, column, title='Scaled Cartogram', cartogram_kwargs=None):
+@profiled
+def scaled_cartogram(geo_data, column, title='Scaled Cartogram', cartogram_kwargs=None, ax=None):
     """
     Creates a scaled cartogram by resizing regions according to a specific value.
     
@@ -110,14 +133,15 @@ def scaled_cartogram(geo_data, column, title='Scaled Cartogram', cartogram_kwarg
     if cartogram_kwargs is None:
         cartogram_kwargs = {}
     
-    geo_data['scaled_area'] = np.sqrt(geo_data[column])  # Scale by square root for better proportions
-    fig, ax = plt.subplots(figsize=(10, 6))
+    geo_data['scaled_area'] = np.sqrt(as_array(geo_data[column]))  # Scale by square root for better proportions
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
     geo_data.plot(ax=ax, **cartogram_kwargs)
     ax.set_title(title)
-    plt.show()
+    return finish(fig)
 
 
-def dot_density(data, title='Dot Density Map', dot_kwargs=None):
+@profiled
+def dot_density(data, title='Dot Density Map', dot_kwargs=None, ax=None):
     """
     Creates a dot density map to show the location of individual events.
     
@@ -126,7 +150,31 @@ def dot_density(data, title='Dot Density Map', dot_kwargs=None):
     if dot_kwargs is None:
         dot_kwargs = {}
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(data['longitude'], data['latitude'], alpha=0.5, **dot_kwargs)
+    fig, ax = new_figure(figsize=(10, 6), ax=ax)
+    ax.scatter(as_array(data['longitude']), as_array(data['latitude']), alpha=0.5, **dot_kwargs)
     ax.set_title(title)
-    plt.show()
\ No newline at end of file
+    return finish(fig)
+
+
+def density_tiles(data, directory, min_zoom=0, max_zoom=14, cmap='Reds', vmax=None, workers=None):
+    """
+    Creates slippy-map XYZ tiles (<directory>/<z>/<x>/<y>.png) of point density for a map viewer.
+
+    Best used for: Zoomable heat maps of millions of points, where a single static image is too coarse.
+
+    Parameters:
+    - data: table with 'longitude' and 'latitude' columns.
+    - vmax: count at the top of the colour scale; None scales each zoom level to its densest pixel.
+    - workers: number of tile-rendering processes (defaults to the CPU count).
+    """
+    build_tiles(data['longitude'], data['latitude'], directory, min_zoom=min_zoom, max_zoom=max_zoom, cmap=cmap,
+                vmax=vmax, workers=workers)
+
+
+def update_density_tiles(data, directory, workers=None):
+    """
+    Adds new points to tiles made by density_tiles, re-rendering only the tiles they touch.
+
+    Best used for: Keeping a tile set current as new events arrive. Returns the number of tiles re-rendered.
+    """
+    return update_tiles(data['longitude'], data['latitude'], directory, workers=workers)
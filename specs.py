@@ -0,0 +1,265 @@
+import argparse
+import collections
+import importlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from profiling import CHART_FUNCTIONS
+
+# Category modules whose public functions can be rendered by name, e.g. "distribution.histogram".
+CHART_MODULES = ('change_in_time', 'correlation', 'deviation', 'distribution', 'facet', 'flow', 'magnitude',
+                 'part_to_whole', 'ranking', 'spatial')
+
+GEO_SUFFIXES = ('.geojson', '.shp', '.gpkg')
+
+
+def resolve_chart(name):
+    """
+    Returns the chart function for a "module.function" name from CHART_MODULES.
+
+    Only chart functions registered by @profiled in that module are accepted, so helpers and
+    names the module merely imports (tile writers, geometry classes, ...) cannot be called.
+    """
+    module_name, _, function_name = str(name).partition('.')
+    if module_name not in CHART_MODULES or not function_name:
+        raise ValueError(f"Unknown chart {name!r}; expected 'module.function' with module in {CHART_MODULES}.")
+    importlib.import_module(module_name)
+    function = CHART_FUNCTIONS.get(f'{module_name}.{function_name}')
+    if function is None:
+        raise ValueError(f"Unknown chart {name!r}.")
+    return function
+
+
+def source_path(source, base_dir='.', confine=False):
+    """
+    Returns the file path of a data source, relative paths being taken from base_dir.
+
+    With confine=True the path must resolve (symlinks included) to a file inside base_dir;
+    anything else, absolute paths and '..' escapes among them, raises ValueError.
+    """
+    path = os.path.join(base_dir, source if isinstance(source, str) else source['path'])
+    if confine:
+        root = os.path.realpath(base_dir)
+        if os.path.commonpath([root, os.path.realpath(path)]) != root:
+            raise ValueError(f"Data source {path!r} is outside the data root {base_dir!r}.")
+    return path
+
+
+def load_source(source, base_dir='.', confine=False):
+    """
+    Loads one data source: a path, or a dict {"path": ..., "format": ..., plus reader options}.
+    With confine=True the file must lie inside base_dir (see source_path).
+
+    NPY files are memory-mapped and Parquet files are read through a memory map into an Arrow
+    table, whose columns the chart functions consume without copies; CSV files become DataFrames
+    and GeoJSON/Shapefile/GeoPackage files GeoDataFrames.
+    """
+    if isinstance(source, str):
+        source = {'path': source}
+    options = {key: value for key, value in source.items() if key not in ('path', 'format')}
+    path = source_path(source, base_dir, confine)
+    kind = source.get('format') or os.path.splitext(path)[1].lower().lstrip('.')
+
+    if kind == 'npy':
+        return np.load(path, mmap_mode=options.pop('mmap_mode', 'r'), **options)
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True, **options)
+    if kind == 'csv':
+        return pd.read_csv(path, **options)
+    if f'.{kind}' in GEO_SUFFIXES:
+        import geopandas as gpd
+
+        return gpd.read_file(path, **options)
+    raise ValueError(f"Unsupported data format {kind!r} for {path!r}.")
+
+
+class DataStore:
+    """
+    Loads named data sources on first use and shares them between every chart that references them.
+
+    Loading is thread-safe and happens once per source; release() drops a source so that its
+    memory can be reclaimed once no remaining chart needs it. With confine=True every source
+    must be a file inside base_dir, which is checked up front.
+    """
+
+    def __init__(self, sources=None, base_dir='.', confine=False):
+        self.sources = dict(sources or {})
+        self.base_dir = base_dir
+        self.confine = confine
+        if confine:
+            for source in self.sources.values():
+                source_path(source, base_dir, confine=True)
+        self._loaded = {}
+        self._locks = {name: threading.Lock() for name in self.sources}
+
+    def get(self, name):
+        if name not in self.sources:
+            raise KeyError(f"Unknown data source {name!r}.")
+        with self._locks[name]:
+            if name not in self._loaded:
+                self._loaded[name] = load_source(self.sources[name], self.base_dir, self.confine)
+            return self._loaded[name]
+
+    def release(self, name):
+        self._loaded.pop(name, None)
+
+    def resolve(self, value):
+        """
+        Replaces every {"ref": name} (optionally with "column") inside kwargs by the loaded data.
+        """
+        if isinstance(value, dict):
+            if 'ref' in value:
+                data = self.get(value['ref'])
+                return data[value['column']] if 'column' in value else data
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+
+def data_refs(value):
+    """
+    Returns the set of data source names referenced anywhere inside a kwargs structure.
+    """
+    if isinstance(value, dict):
+        if 'ref' in value:
+            return {value['ref']}
+        return set().union(*map(data_refs, value.values()))
+    if isinstance(value, list):
+        return set().union(*map(data_refs, value))
+    return set()
+
+
+def render_spec(spec, store=None, data_root=None):
+    """
+    Renders a chart spec {"chart": "module.function", "kwargs": {...}, "format": "png", "dpi": 100}
+    and returns the encoded file as bytes. Data references are resolved from `store`, or from
+    the spec's own "data" section, whose files must then lie inside data_root when it is given.
+    """
+    if store is None:
+        store = DataStore(spec.get('data'), data_root or '.', confine=data_root is not None)
+    fig = resolve_chart(spec['chart'])(**store.resolve(spec.get('kwargs', {})))
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=spec.get('format', 'png'), dpi=spec.get('dpi'))
+    return buffer.getvalue()
+
+
+def load_manifest(path):
+    """
+    Reads a JSON or YAML manifest: {"data": {name: source}, "charts": [chart spec, ...]}.
+    """
+    with open(path) as file:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+
+            return yaml.safe_load(file)
+        return json.load(file)
+
+
+def chart_ids(charts):
+    """
+    Returns the id of every chart spec: its "id", or its position in the manifest when it has none.
+
+    Raises ValueError when two charts share an id.
+    """
+    ids = [str(chart.get('id', index)) for index, chart in enumerate(charts)]
+    duplicates = sorted(chart_id for chart_id, count in collections.Counter(ids).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate chart ids: {duplicates}.")
+    return ids
+
+
+def plan_batches(charts):
+    """
+    Groups chart specs into batches whose "depends_on" charts all belong to earlier batches.
+
+    Charts are identified by chart_ids; unknown dependencies, duplicate ids and cycles raise ValueError.
+    """
+    ids = chart_ids(charts)
+    by_id = dict(zip(ids, charts))
+    waiting = {chart_id: set(map(str, by_id[chart_id].get('depends_on', []))) for chart_id in ids}
+    unknown = set().union(*waiting.values()) - set(ids)
+    if unknown:
+        raise ValueError(f"Unknown chart dependencies: {sorted(unknown)}.")
+
+    batches = []
+    while waiting:
+        ready = [chart_id for chart_id, needs in waiting.items() if not needs]
+        if not ready:
+            raise ValueError(f"Dependency cycle between charts {sorted(waiting)}.")
+        batches.append([by_id[chart_id] for chart_id in ready])
+        for chart_id in ready:
+            del waiting[chart_id]
+        for needs in waiting.values():
+            needs.difference_update(ready)
+    return batches
+
+
+def render_manifest(manifest, output_dir='.', base_dir='.', workers=None):
+    """
+    Renders every chart of a manifest into output_dir and returns the written paths.
+
+    Charts run batch by batch in a thread pool; each data source is loaded once, shared by all
+    charts that reference it, and released after the last of them has been rendered. A chart
+    without an "output" is written to "<id>.<format>"; two charts writing the same file raise
+    ValueError before anything is rendered.
+    """
+    charts = manifest.get('charts', [])
+    outputs, writers = {}, {}
+    for chart_id, chart in zip(chart_ids(charts), charts):
+        path = os.path.normpath(os.path.join(output_dir, chart.get('output') or f"{chart_id}.{chart.get('format', 'png')}"))
+        if path in writers:
+            raise ValueError(f"Charts {writers[path]!r} and {chart_id!r} both write to {path!r}.")
+        outputs[chart_id] = path
+        writers[path] = chart_id
+    # Every spec carries its resolved id so that render() can find its output path.
+    charts = [dict(chart, id=chart_id) for chart_id, chart in zip(outputs, charts)]
+    store = DataStore(manifest.get('data'), base_dir)
+    remaining = {}
+    for chart in charts:
+        for name in data_refs(chart.get('kwargs', {})):
+            remaining[name] = remaining.get(name, 0) + 1
+    lock = threading.Lock()
+
+    def render(chart):
+        path = outputs[chart['id']]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(render_spec(chart, store))
+        with lock:
+            for name in data_refs(chart.get('kwargs', {})):
+                remaining[name] -= 1
+                if remaining[name] == 0:
+                    store.release(name)
+        return path
+
+    paths = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in plan_batches(charts):
+            paths.extend(pool.map(render, batch))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render every chart of a JSON or YAML manifest.')
+    parser.add_argument('manifest')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    paths = render_manifest(manifest, args.output_dir, os.path.dirname(os.path.abspath(args.manifest)), args.workers)
+    for path in paths:
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from adapters import as_array
+from palettes import get_cmap
+
+TILE_BITS = 8
+TILE_SIZE = 1 << TILE_BITS
+MAX_LATITUDE = 85.05112878  # Web-mercator latitude limit
+
+# Deepest zoom level: max-zoom pixel coordinates are kept as uint32.
+MAX_ZOOM = 32 - TILE_BITS
+
+# Tiles are handed to worker processes in batches of this many.
+TILES_PER_TASK = 256
+
+# zlib level for tile PNGs: encoding dominates the render time, and level 1 is about three times
+# faster than Pillow's default for files roughly 50% larger.
+PNG_COMPRESS_LEVEL = 1
+
+
+def mercator_pixels(lon, lat, zoom):
+    """
+    Returns global web-mercator pixel coordinates (x east, y south) of points at a zoom level.
+    """
+    scale = TILE_SIZE * 2 ** zoom
+    lat = np.radians(np.clip(as_array(lat), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (as_array(lon) + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * scale
+    return (np.clip(x, 0, scale - 1).astype(np.uint32),
+            np.clip(y, 0, scale - 1).astype(np.uint32))
+
+
+def _spread_bits(values):
+    # Spreads the 32 bits of each value over the even bits of a uint64.
+    values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def morton_codes(tile_x, tile_y):
+    """
+    Interleaves tile coordinates into Morton (Z-order) codes; their base-4 digits are the quadkey.
+    """
+    return _spread_bits(tile_x) | (_spread_bits(tile_y) << np.uint64(1))
+
+
+def quadkey(zoom, x, y):
+    """
+    Returns the Bing-style quadkey string of tile (zoom, x, y).
+    """
+    return ''.join(str(((x >> bit) & 1) | (((y >> bit) & 1) << 1)) for bit in range(zoom - 1, -1, -1))
+
+
+class _Index:
+    # Points sorted by Morton code of their max-zoom tile, stored as .npy files so that worker
+    # processes memory-map them instead of receiving pickled copies. Files are replaced, never
+    # rewritten in place, so maps opened on the previous version stay valid.
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'index')
+
+    def save(self, **arrays):
+        os.makedirs(self.path, exist_ok=True)
+        for name, array in arrays.items():
+            path = os.path.join(self.path, f'{name}.npy')
+            np.save(path + '.tmp.npy', array)
+            os.replace(path + '.tmp.npy', path)
+
+    def load(self, name):
+        return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+
+
+def _tile_counts(x, y, shift):
+    local = ((y >> shift) % TILE_SIZE).astype(np.intp) * TILE_SIZE + (x >> shift) % TILE_SIZE
+    return np.bincount(local, minlength=TILE_SIZE * TILE_SIZE).reshape(TILE_SIZE, TILE_SIZE)
+
+
+def _process_tiles(directory, zoom, max_zoom, tasks, vmax=None, cmap='Reds'):
+    # Worker entry point: with vmax=None returns the largest pixel count of the given tiles,
+    # otherwise renders each of them to <directory>/<zoom>/<x>/<y>.png.
+    index = _Index(directory)
+    x, y = index.load('x'), index.load('y')
+    shift = max_zoom - zoom
+    peak = 0
+    if vmax is not None:
+        # Counts map to a 256-entry RGBA table on a log scale from 1 to vmax; empty pixels are transparent.
+        table = np.round(get_cmap(cmap)(np.linspace(0, 1, 256)) * 255).astype(np.uint8)
+        table[..., 3] = 255
+        scale = 255 / np.log(max(vmax, 2))
+    for start, stop, tile_x, tile_y in tasks:
+        counts = _tile_counts(np.asarray(x[start:stop]), np.asarray(y[start:stop]), shift)
+        if vmax is None:
+            peak = max(peak, int(counts.max()))
+            continue
+        image = table[np.minimum(np.log(np.maximum(counts, 1)) * scale, 255).astype(np.uint8)]
+        image[counts == 0, 3] = 0
+        folder = os.path.join(directory, str(zoom), str(tile_x))
+        os.makedirs(folder, exist_ok=True)
+        Image.fromarray(image).save(os.path.join(folder, f'{tile_y}.png'), compress_level=PNG_COMPRESS_LEVEL)
+    return peak
+
+
+def _tile_ranges(codes, x, y, zoom, max_zoom, keys=None):
+    # Contiguous point ranges of the non-empty tiles at `zoom` (or only of the tiles in `keys`).
+    shift = 2 * (max_zoom - zoom)
+    if keys is None:
+        tile_keys = codes >> np.uint64(shift)
+        starts = np.concatenate(([0], np.flatnonzero(tile_keys[1:] != tile_keys[:-1]) + 1))
+        stops = np.append(starts[1:], len(codes))
+    else:
+        starts = np.searchsorted(codes, keys << np.uint64(shift), side='left')
+        stops = np.searchsorted(codes, (keys + np.uint64(1)) << np.uint64(shift), side='left')
+        keep = stops > starts
+        starts, stops = starts[keep], stops[keep]
+    pixel_shift = max_zoom - zoom + TILE_BITS
+    return [(int(start), int(stop), int(x[start]) >> pixel_shift, int(y[start]) >> pixel_shift)
+            for start, stop in zip(starts, stops)]
+
+
+def _run(pool, directory, zoom, max_zoom, ranges, vmax=None, cmap='Reds'):
+    tasks = [ranges[i:i + TILES_PER_TASK] for i in range(0, len(ranges), TILES_PER_TASK)]
+    peaks = pool.map(_process_tiles, *zip(*[(directory, zoom, max_zoom, task, vmax, cmap) for task in tasks]))
+    return max(peaks, default=0)
+
+
+def build_tiles(lon, lat, directory, min_zoom=0, max_zoom=14, cmap='Reds', vmax=None, workers=None):
+    """
+    Renders point-density XYZ tiles (<directory>/<z>/<x>/<y>.png) for zoom levels min_zoom..max_zoom.
+
+    Points are projected once to max-zoom web-mercator pixels and sorted by the Morton code of
+    their tile, which makes every tile at every zoom level a contiguous slice of the sorted
+    points. Each tile is a 256x256 bincount of its slice, coloured on a log scale, with empty
+    pixels transparent and empty tiles skipped. Tiles are rendered in batches by worker processes
+    that memory-map the sorted points, which are kept in <directory>/index for update_tiles.
+
+    Parameters:
+    - vmax: count mapped to the top of the colour scale, per zoom level; None uses the densest
+      pixel of each level, found in a first counting pass.
+    - workers: number of worker processes (defaults to the CPU count).
+    """
+    if not 0 <= min_zoom <= max_zoom <= MAX_ZOOM:
+        raise ValueError(f"Zoom levels must satisfy 0 <= min_zoom <= max_zoom <= {MAX_ZOOM}.")
+    x, y = mercator_pixels(lon, lat, max_zoom)
+    codes = morton_codes(x >> TILE_BITS, y >> TILE_BITS)
+    order = np.argsort(codes, kind='stable')
+    codes, x, y = codes[order], x[order], y[order]
+    _Index(directory).save(codes=codes, x=x, y=y)
+
+    scales = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for zoom in range(min_zoom, max_zoom + 1):
+            ranges = _tile_ranges(codes, x, y, zoom, max_zoom)
+            scales[zoom] = vmax if vmax is not None else _run(pool, directory, zoom, max_zoom, ranges)
+            _run(pool, directory, zoom, max_zoom, ranges, scales[zoom], cmap)
+
+    with open(os.path.join(directory, 'tiles.json'), 'w') as file:
+        json.dump({'min_zoom': min_zoom, 'max_zoom': max_zoom, 'cmap': cmap, 'vmax': scales}, file)
+
+
+def update_tiles(lon, lat, directory, workers=None):
+    """
+    Adds points to tiles made by build_tiles and re-renders only the tiles they fall into.
+
+    The new points are merged into the sorted index, and the colour scale of the original build
+    is kept so that untouched tiles still match.
+    Returns the number of tiles re-rendered.
+    """
+    with open(os.path.join(directory, 'tiles.json')) as file:
+        meta = json.load(file)
+    min_zoom, max_zoom = meta['min_zoom'], meta['max_zoom']
+
+    new_x, new_y = mercator_pixels(lon, lat, max_zoom)
+    new_codes = morton_codes(new_x >> TILE_BITS, new_y >> TILE_BITS)
+    order = np.argsort(new_codes, kind='stable')
+    new_codes, new_x, new_y = new_codes[order], new_x[order], new_y[order]
+
+    index = _Index(directory)
+    codes = index.load('codes')
+    positions = np.searchsorted(codes, new_codes, side='right')
+    codes = np.insert(codes, positions, new_codes)
+    x = np.insert(index.load('x'), positions, new_x)
+    y = np.insert(index.load('y'), positions, new_y)
+    index.save(codes=codes, x=x, y=y)
+
+    rendered = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for zoom in range(min_zoom, max_zoom + 1):
+            touched = np.unique(new_codes >> np.uint64(2 * (max_zoom - zoom)))
+            ranges = _tile_ranges(codes, x, y, zoom, max_zoom, keys=touched)
+            _run(pool, directory, zoom, max_zoom, ranges, meta['vmax'][str(zoom)], meta['cmap'])
+            rendered += len(ranges)
+    return rendered
@@ -0,0 +1,66 @@
+import heapq
+
+import matplotlib.dates as mdates
+import numpy as np
+
+from adapters import as_column
+from artists import bar_collection
+
+
+def interval_bounds(durations):
+    """
+    Splits (start, end) pairs into float start and end arrays.
+
+    Datetime pairs (datetime64 or datetime objects) become matplotlib date numbers.
+    Returns (starts, ends, is_date).
+    """
+    durations = as_column(durations)
+    if durations.dtype == object:
+        durations = durations.astype('datetime64[us]')
+    if np.issubdtype(durations.dtype, np.datetime64):
+        return mdates.date2num(durations[:, 0]), mdates.date2num(durations[:, 1]), True
+    durations = durations.astype(float)
+    return durations[:, 0], durations[:, 1], False
+
+
+def pack_intervals(starts, ends):
+    """
+    Assigns every interval to the lowest lane that is free at its start (greedy interval partitioning).
+
+    Intervals are visited by start time while a heap tracks when each busy lane frees up,
+    so packing costs O(n log n) and uses the minimum possible number of lanes.
+    Returns the lane index of each interval.
+    """
+    order = np.argsort(starts, kind='stable')
+    lanes = np.empty(len(starts), dtype=np.intp)
+    busy = []
+    free = []
+    n_lanes = 0
+    for index, start, end in zip(order.tolist(), starts[order].tolist(), ends[order].tolist()):
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane = n_lanes
+            n_lanes += 1
+        lanes[index] = lane
+        heapq.heappush(busy, (end, lane))
+    return lanes
+
+
+def visible_intervals(starts, ends, window):
+    """
+    Returns a boolean mask of the intervals that overlap window=(start, end).
+    """
+    return (ends >= window[0]) & (starts <= window[1])
+
+
+def draw_intervals(ax, starts, ends, rows, height=0.8, is_date=False, **collection_kwargs):
+    """
+    Draws intervals as horizontal bars on the given rows with a single PolyCollection.
+    """
+    bars = bar_collection(ax, rows, ends - starts, width=height, bottom=starts, horizontal=True, **collection_kwargs)
+    if is_date:
+        ax.xaxis_date()
+    return bars